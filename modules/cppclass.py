@@ -1,13 +1,17 @@
+import textwrap
 from modules import cppfunction as cfun
 from modules import cppvariable as cvar
 from modules import cppcodeline as cline
 from modules import cppvector as cvec
 from modules import cppvector as ctup
+from modules import templates
 
 class CPPClass:
     """
     Class to represent Python classes as C++ classes.
     """
+    # Shared output template, built once for all classes
+    template = templates.CLASS_TEMPLATE
     
     def __init__(self, name, lineno, end_lineno, bases=None):
         """
@@ -45,6 +49,39 @@ class CPPClass:
         """
         self.attributes[variable.name] = variable
 
+    def add_vector(self, vector):
+        """
+        Adds a vector attribute to the class.
+
+        Parameters
+        ----------
+        vector : CPPVector
+            The vector to add as a class attribute.
+        """
+        self.vectors[vector.name] = vector
+
+    def add_tuple(self, tup):
+        """
+        Adds a tuple attribute to the class.
+
+        Parameters
+        ----------
+        tup : CPPTuple
+            The tuple to add as a class attribute.
+        """
+        self.tuples[tup.name] = tup
+
+    def add_set(self, cpp_set):
+        """
+        Adds a set attribute to the class.
+
+        Parameters
+        ----------
+        cpp_set : CPPSet
+            The set to add as a class attribute.
+        """
+        self.sets[cpp_set.name] = cpp_set
+
     def add_method(self, function):
         """
         Adds a method to the class.
@@ -80,35 +117,32 @@ class CPPClass:
         str
             String containing the class's C++ code.
         """
-        class_text = f"class {self.name}"
+        bases = ""
         if self.bases:
-            class_text += " : public " + ", public ".join(self.bases)
-        class_text += "\n{\npublic:\n"
+            bases = " : public " + ", public ".join(self.bases)
 
         # Add attributes (instance variables)
+        tab = cline.CPPCodeLine.tab_delimiter
+        members = []
+        type_get = cvar.CPPVariable.types.get
         for attr in self.attributes.values():
-            attr_type = cvar.CPPVariable.types.get(attr.py_var_type[0], "auto ")
-            class_text += f"{cline.CPPCodeLine.tab_delimiter}{attr_type}{attr.name};\n"
+            attr_type = type_get(attr.py_var_type[0], "auto ")
+            members.append(f"{tab}{attr_type}{attr.name};\n")
         for vector in self.vectors.values():
-            vec_decl= vector.declaration()
-            class_text+=f"{cline.CPPCodeLine.tab_delimiter}{ vec_decl}\n"
+            members.append(f"{tab}{vector.declaration()}\n")
         for tup in self.tuples.values():
-            tup_decl= tup.declaration()
-            class_text+=f"{cline.CPPCodeLine.tab_delimiter}{ tup_decl}\n"
+            members.append(f"{tab}{tup.declaration()}\n")
         for set in self.sets.values():
-            set_decl= set.declaration()
-            class_text+=f"{cline.CPPCodeLine.tab_delimiter}{ set_decl}\n"
+            members.append(f"{tab}{set.declaration()}\n")
 
         # Add methods
+        methods = []
         for method in self.methods.values():
-            method_text = method.get_formatted_function_text()
-            # Indent method text
-            method_lines = method_text.split("\n")
-            indented_method = "\n".join(
-                f"{cline.CPPCodeLine.tab_delimiter}{line}" if line.strip() else line
-                for line in method_lines
-            )
-            class_text += f"{indented_method}\n"
-
-        class_text += "};\n"
-        return class_text
\ No newline at end of file
+            # Indent every non-blank line of the method text
+            indented_method = textwrap.indent(method.get_formatted_function_text(),
+                                              tab, str.strip)
+            methods.append(f"{indented_method}\n")
+
+        return self.template.format(name=self.name, bases=bases,
+                                    members="".join(members),
+                                    methods="".join(methods))
@@ -4,6 +4,9 @@ class CPPCodeLine():
     """
     # Using a variable in case we want to use tabs instead of spaces
     tab_delimiter = "    "
+
+    __slots__ = ("start_line_num", "end_line_num", "end_char_index", "indent",
+                 "code_str", "comment_str", "pre_comment_str")
     
     def __init__(self, start_line_num, end_line_num, end_char_index,
                  indent, code_str="", comment_str="", pre_comment_str=""):
@@ -1,7 +1,14 @@
+from modules import templates
+
 class CPPFile():
     """
     Class to represent a C++ file that will be exported
     """
+    # Shared output template, built once for all files
+    template = templates.FILE_TEMPLATE
+    
+    __slots__ = ("includes", "functions", "classes", "free_functions",
+                 "methods", "filename")
     
     def __init__(self,filename):
         """
@@ -12,13 +19,20 @@ class CPPFile():
         filename : str
             Name for the file
         """
-        # Includes are just strings of name of include file
-        self.includes=[]
+        # Includes are just strings of name of include file, stored as the
+        # keys of a dictionary so it acts as an ordered set
+        self.includes={}
         
         # Stored as a dictionary of {Function Name: CPPFunction object}
         self.functions = {}
         self.classes = {}
         
+        # The same functions partitioned by add_function into free
+        # functions (including main) and class methods, so emission doesn't
+        # need to filter the function keys
+        self.free_functions = {}
+        self.methods = {}
+        
         self.filename = filename
         
     def add_include_file(self, file):
@@ -31,8 +45,25 @@ class CPPFile():
         file : str
             Name of the include file to add
         """
-        if file not in self.includes:
-            self.includes.append(file)
+        self.includes[file] = None
+    def add_function(self, key, function):
+        """
+        Adds a CPPFunction to the file under the given key. Class methods
+        use keys of the form ClassName::method and main uses the key "0"
+
+        Parameters
+        ----------
+        key : str
+            Key used to find the function in the function dictionary
+        function : CPPFunction
+            The function to add
+        """
+        if "::" in key:
+            self.methods[key] = function
+        else:
+            self.free_functions[key] = function
+        self.functions[key] = function
+        
     def add_class(self, cpp_class):
         """
         Adds a CPPClass to the file.
@@ -48,31 +79,27 @@ class CPPFile():
         """
         Generates the text representing the entire C++ file
         """
-        return_str = ""
-        
         # Includes
-        for file in self.includes:
-            return_str += "#include <" + file + ">\n"
+        includes = ["#include <" + file + ">\n" for file in self.includes]
         
         # Forward declarations for classes
-        for c in self.classes.values():
-            return_str += c.get_forward_declaration() + "\n"
+        forward_declarations = [c.get_forward_declaration() + "\n"
+                                for c in self.classes.values()]
             
-        # Forward declarations for functions (skip class methods and main)
-        for function_key in self.functions:
-            if "::" not in function_key and function_key != "0":
-                return_str += self.functions[function_key].get_forward_declaration() + ";\n"
-        return_str += "\n"
+        # Forward declarations for functions (skip main)
+        for function_key, func in self.free_functions.items():
+            if function_key != "0":
+                forward_declarations.append(func.get_forward_declaration() + ";\n")
 
         # Class definitions
-        for c in self.classes.values():
-            return_str += c.get_formatted_class_text() + "\n\n"
+        classes = [c.get_formatted_class_text() + "\n\n"
+                   for c in self.classes.values()]
         
         # Function definitions (including main)
-        for function_key in self.functions:
-            if "::" not in function_key:
-                func = self.functions[function_key]
-                return_str += func.get_formatted_function_text() + "\n\n"
+        functions = [func.get_formatted_function_text() + "\n\n"
+                     for func in self.free_functions.values()]
             
-        return return_str
-        
\ No newline at end of file
+        return self.template.format(includes="".join(includes),
+                                    forward_declarations="".join(forward_declarations),
+                                    classes="".join(classes),
+                                    functions="".join(functions))
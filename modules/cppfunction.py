@@ -1,11 +1,19 @@
 from modules import cppvariable as cvar
+from modules import templates
 
 class CPPFunction():
     """
     Class to represent Python functions as C++ functions
     """
+    # Shared output template, built once for all functions
+    template = templates.FUNCTION_TEMPLATE
     
-    def __init__(self, name, lineno, end_lineno, parameters={}):
+    __slots__ = ("name", "lineno", "end_lineno", "parameters", "lines_list",
+                 "_base_line",
+                 "variables", "vectors", "tuples", "sets", "return_type",
+                 "_sig_cache", "_fwd_cache", "_symbol_index")
+    
+    def __init__(self, name, lineno, end_lineno, parameters=None):
         """
         Constructs a CPPFunction object
 
@@ -17,7 +25,7 @@ class CPPFunction():
             The line where the function is declared in the python file
         end_lineno : int
             The line where the function ends in the python file
-        parameters : dict of {str: CPPVariable}
+        parameters : dict of {str: CPPVariable}, optional
             The parameters this function has passed in
         """
         
@@ -33,13 +41,15 @@ class CPPFunction():
         # Provides a lookup table for parameters, allowing for type updates
         # as file is parsed
         # Dictionary of {Variable Name : CPPVariable Object}
-        self.parameters = parameters
+        self.parameters = {} if parameters is None else parameters
         
         
-        # Lines in a function stored as a dictionary of format
-        # {LineNumber : CPPCodeLine} where line number is an int of the line
-        # number in the python script
-        self.lines = {}
+        # Lines in a function stored as a list of CPPCodeLine indexed by the
+        # line number in the python script minus _base_line, with None for
+        # lines that have no code. See set_line and get_line
+        self.lines_list = []
+        # Main takes lines from anywhere in the file, so it starts at 0
+        self._base_line = max(lineno, 0)
         
         # Provides a lookup table for variables declared in the scope,
         # allowing for type updates as the file is parsed
@@ -50,10 +60,148 @@ class CPPFunction():
         self.tuples={}
         self.sets= {}
         
+        # Single lookup table over all of the above, built on first use and
+        # dropped whenever a declaration is added through the add_* methods
+        self._symbol_index = None
+        
         # Using a list so type gets updated if more information is found about
         # a related variable
         self.return_type = ["void"]
         
+        # Rendered signatures keyed by the return type and parameter types
+        # they were built from. Types are updated in place during analysis,
+        # so a changed type simply produces a new key
+        self._sig_cache = {}
+        self._fwd_cache = {}
+        
+    def set_line(self, lineno, line):
+        """
+        Stores the code line for a line of the python script, replacing any
+        line already stored there
+
+        Parameters
+        ----------
+        lineno : int
+            The line number in the python script
+        line : CPPCodeLine
+            The code line to store
+        """
+        index = lineno - self._base_line
+        lines_list = self.lines_list
+        if index < 0:
+            # Line is before any stored so far, so move the start back
+            lines_list[:0] = [None] * -index
+            self._base_line = lineno
+            index = 0
+        elif index >= len(lines_list):
+            lines_list.extend([None] * (index + 1 - len(lines_list)))
+        lines_list[index] = line
+    
+    def get_line(self, lineno):
+        """
+        Gets the code line stored for a line of the python script
+
+        Parameters
+        ----------
+        lineno : int
+            The line number in the python script
+
+        Returns
+        -------
+        CPPCodeLine or None
+            The code line, or None if there isn't one for that line
+        """
+        index = lineno - self._base_line
+        if 0 <= index < len(self.lines_list):
+            return self.lines_list[index]
+        return None
+    
+    def line_items(self):
+        """
+        Gets every stored code line with its line number, in line order
+
+        Returns
+        -------
+        generator of (int, CPPCodeLine)
+            The line number in the python script and its code line
+        """
+        base_line = self._base_line
+        return ((base_line + index, line)
+                for index, line in enumerate(self.lines_list)
+                if line is not None)
+    
+    # Symbol tables in order of precedence for names found in more than one
+    symbol_tables = ("parameters", "variables", "vectors", "tuples", "sets")
+    
+    def add_variable(self, variable):
+        """
+        Adds a variable declared in this function's scope
+
+        Parameters
+        ----------
+        variable : CPPVariable
+            The variable to add
+        """
+        self.variables[variable.name] = variable
+        self._symbol_index = None
+    
+    def add_vector(self, vector):
+        """
+        Adds a vector declared in this function's scope
+
+        Parameters
+        ----------
+        vector : CPPVector
+            The vector to add
+        """
+        self.vectors[vector.name] = vector
+        self._symbol_index = None
+    
+    def add_tuple(self, tup):
+        """
+        Adds a tuple declared in this function's scope
+
+        Parameters
+        ----------
+        tup : CPPTuple
+            The tuple to add
+        """
+        self.tuples[tup.name] = tup
+        self._symbol_index = None
+    
+    def add_set(self, cpp_set):
+        """
+        Adds a set declared in this function's scope
+
+        Parameters
+        ----------
+        cpp_set : CPPSet
+            The set to add
+        """
+        self.sets[cpp_set.name] = cpp_set
+        self._symbol_index = None
+    
+    def symbol_index(self):
+        """
+        Gets a table of every name known in this function's scope, so a name
+        can be resolved with one lookup instead of a probe per symbol table
+
+        Returns
+        -------
+        dict of {str: (str, object)}
+            Maps each name to the symbol table it was found in, e.g.
+            "vectors", and the object stored there. A name in several tables
+            maps to the one earliest in symbol_tables
+        """
+        if self._symbol_index is None:
+            index = {}
+            # Filling from the lowest precedence lets higher tables overwrite
+            for kind in reversed(self.symbol_tables):
+                for name, symbol in getattr(self, kind).items():
+                    index[name] = (kind, symbol)
+            self._symbol_index = index
+        return self._symbol_index
+    
     def get_forward_declaration(self):
         """
         Generates the string representation of this function's forward
@@ -66,19 +214,18 @@ class CPPFunction():
             The function's forward declaration
         """
         ret_type=self.return_type[0]
-        if ret_type =="constructor":
-            function_signature=""
-        else:
-            function_signature = cvar.CPPVariable.types[ret_type]
-        function_signature += self.name + "("
-        
-        if len(self.parameters) > 0:
-            for parameter in self.parameters:
-                function_signature += cvar.CPPVariable.types[self.parameters[parameter].py_var_type[0]]
-                function_signature += parameter + ", "
-            function_signature = function_signature[:-2]
-            
-        return function_signature + ")"
+        key = (ret_type, tuple((name, parameter.py_var_type[0])
+                               for name, parameter in self.parameters.items()))
+        if key in self._fwd_cache:
+            return self._fwd_cache[key]
+
+        type_get = cvar.CPPVariable.types.__getitem__
+        ret = "" if ret_type == "constructor" else type_get(ret_type)
+        params = ", ".join(type_get(parameter.py_var_type[0]) + name
+                           for name, parameter in self.parameters.items())
+        function_signature = f"{ret}{self.name}({params})"
+        self._fwd_cache[key] = function_signature
+        return function_signature
     
     def get_signature(self):
         """
@@ -90,27 +237,21 @@ class CPPFunction():
             The function's signature
         """
         ret_type=self.return_type[0]
-        if ret_type =="constructor":
-            function_signature=""
-        else:
-            function_signature = cvar.CPPVariable.types[ret_type]
+        key = (ret_type, tuple((parameter.name, parameter.py_var_type[0])
+                               for parameter in self.parameters.values()))
+        if key in self._sig_cache:
+            return self._sig_cache[key]
+
+        type_get = cvar.CPPVariable.types.__getitem__
+        ret = "" if ret_type == "constructor" else type_get(ret_type)
         # Convert internally named main function to proper name
-        if self.name == "0":
-            function_signature += "main("
-        else:
-            function_signature += self.name + "("
-
-        # Check if there are any parameters before attempting to add them
-        if len(self.parameters.values()) > 0:
-            for parameter in self.parameters.values():
-                # Prepend the param type in C++ style before the param name
-                function_signature += cvar.CPPVariable.types[parameter.py_var_type[0]]
-                function_signature += parameter.name + ", "
-
-            # Remove the extra comma and space
-            function_signature = function_signature[:-2]
-
-        return function_signature + ")"
+        name = "main" if self.name == "0" else self.name
+        # Prepend the param type in C++ style before each param name
+        params = ", ".join(type_get(parameter.py_var_type[0]) + parameter.name
+                           for parameter in self.parameters.values())
+        function_signature = f"{ret}{name}({params})"
+        self._sig_cache[key] = function_signature
+        return function_signature
     
     def get_formatted_function_text(self):
         """
@@ -118,16 +259,15 @@ class CPPFunction():
 
         :return: String containing all of the function's C++ code
         """
-        return_str = ""
-
-        # First line is the function signature
-        return_str += self.get_signature() + "\n{\n"
-
         # Go through all lines and get their formatted string version and
-        # append to the string we will return
-        for line in self.lines.values():
-            return_str += line.get_formatted_code_line() + "\n"
+        # append to the body we will render. The list is already in line
+        # order, gaps are lines without code
+        body = [line.get_formatted_code_line() + "\n"
+                for line in self.lines_list if line is not None]
+        main_return = ""
         if(self.name=="0"):
-            return_str+="\n\treturn 0;\n"
-        # Add a closing bracket for the end of the function
-        return return_str + "}"
\ No newline at end of file
+            main_return="\n\treturn 0;\n"
+        # The template adds the braces around the body
+        return self.template.format(signature=self.get_signature(),
+                                    body="".join(body),
+                                    main_return=main_return)
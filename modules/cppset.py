@@ -4,6 +4,8 @@ class CPPSet:
     """
     Represents a C++ set and provides methods to handle set operations.
     """
+    __slots__ = ("name", "py_var_type", "elements")
+
     def __init__(self, name, py_var_type="auto", elements=None):
         """
         Initialize a CPPSet.
@@ -19,7 +21,7 @@ class CPPSet:
         """
         self.name = name
         self.py_var_type = [py_var_type]
-        self.elements = elements or []
+        self.elements = [] if elements is None else elements
 
     def declaration(self):
         """
@@ -30,5 +32,6 @@ class CPPSet:
         str
             The C++ declaration as a string.
         """
+        types = cvar.CPPVariable.types
         elements_str = ", ".join(map(str, self.elements)) if self.elements else ""
-        return f"std::unordered_set<{cvar.CPPVariable.types[self.py_var_type[0]]}> {self.name} = {{ {elements_str} }};"
+        return f"std::unordered_set<{types[self.py_var_type[0]]}> {self.name} = {{ {elements_str} }};"
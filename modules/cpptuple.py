@@ -3,6 +3,8 @@ class CPPTuple:
     """
     Represents a C++ tuple and provides methods to handle tuple operations.
     """
+    __slots__ = ("name", "elements", "element_type_list")
+
     def __init__(self, name, elements=None, element_types=None):
         """
         Initialize a CPPTuple.
@@ -17,8 +19,8 @@ class CPPTuple:
             Initial element types for the tuple.
         """
         self.name = name
-        self.elements = elements or []
-        self.element_type_list= element_types or []
+        self.elements = [] if elements is None else elements
+        self.element_type_list = [] if element_types is None else element_types
 
     def declaration(self):
         """
@@ -29,8 +31,10 @@ class CPPTuple:
         str
             The C++ declaration as a string.
         """
+        types = cvar.CPPVariable.types
+        type_str = ", ".join(types[e[0]] for e in self.element_type_list)
         elements_str = ", ".join(map(str, self.elements))
-        return f"std::tuple<{', '.join([cvar.CPPVariable.types[e[0]] for e in self.element_type_list])}> {self.name} = std::make_tuple({elements_str});"
+        return f"std::tuple<{type_str}> {self.name} = std::make_tuple({elements_str});"
 
     def access_element(self, index):
         """
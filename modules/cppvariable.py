@@ -1,3 +1,5 @@
+import sys
+
 class CPPVariable():
     """
     This class represents a variable, holding information about it to be used
@@ -5,15 +7,24 @@ class CPPVariable():
     """
     
     # Using redundant mapping to allow for changes to mapped type
-    types = {
+    # Keys are interned since type names are compared and looked up
+    # constantly during analysis
+    types = {sys.intern(py_type): cpp_type for py_type, cpp_type in {
              "int": "int ", "float": "double ", "str": "std::string ",
              "bool": "bool ", "None": "NULL", "char **": "char **",
              "void": "void ", "auto": "auto ", "NoneType": "void "
-             }
+             }.items()}
+    
+    # C++ cast for each type, without the trailing space the declarations
+    # use. Strings are converted with std::to_string instead of a cast
+    cast_types = {py_type: cpp_type[:-1] for py_type, cpp_type in types.items()
+                  if py_type != "str"}
     
     # Python uses capital letters while C++ uses lowercase
     bool_map = {"True": "true", "False": "false"}
     
+    __slots__ = ("name", "line_num", "py_var_type")
+
     def __init__(self, name, line_num, py_var_type):
         """
         Constructs a C++ variable object representation converted from python
@@ -3,6 +3,8 @@ class CPPVector:
     """
     Represents a C++ vector and provides methods to handle vector operations.
     """
+    __slots__ = ("name", "py_var_type", "elements")
+
     def __init__(self, name, py_var_type="auto", elements=None):
         """
         Initialize a CPPVector.
@@ -18,7 +20,7 @@ class CPPVector:
         """
         self.name = name
         self.py_var_type = [py_var_type]
-        self.elements = elements or []
+        self.elements = [] if elements is None else elements
 
     def declaration(self):
         """
@@ -12,13 +12,10 @@ def print_translation(args):
     str
         The converted print statement
     """
-    
-    return_str = "std::cout << "
-
-    for arg in args[:-1]:
-        return_str += arg + " + "
-
-    return return_str + args[-1] + " << std::endl"
+    # A bare print() only ends the line
+    if not args:
+        return "std::cout << std::endl"
+    return "std::cout << " + " + ".join(args) + " << std::endl"
 
 
 def sqrt_translation(args):
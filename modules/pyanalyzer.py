@@ -1,4 +1,5 @@
 import ast
+import sys
 from modules import cppfile as cfile
 from modules import cppfunction as cfun
 from modules import cppvariable as cvar
@@ -10,6 +11,11 @@ from modules import cpptuple as ctup
 from modules import cppclass as cclass
 from modules import cppset as cset
 
+# Types reported for names bound to tuples and sets. Nothing updates these in
+# place, so every lookup can share one immutable marker
+_TUPLE_TYPE = ("Tuple",)
+_SET_TYPE = ("Set",)
+
 class PyAnalyzer():
     """
     This is the main class of PyCatalyst that performs the actual analysis and 
@@ -19,23 +25,68 @@ class PyAnalyzer():
     # types (lower value higher precedence)
     type_precedence_dict = {"str": 0, "float": 1, "int": 2, "bool": 3,
                             "auto": 8, "None": 9, "void": 9}
-    # Python operators translated to C++ operators
-    operator_map = {"Add": "+", "Sub": "-", "Mult": " * ", "Div": "/",
-                    "Mod": " % ", "LShift": " << ", "RShift": " >> ",
-                    "BitOr": " | ", "BitAnd": " & ", "BitXor": " ^ ",
-                    "FloorDiv": "/", "Pow": "Pow", "Not": "!",
-                    "Invert": "~", "UAdd": "+", "USub": "-", "And": " && ",
-                    "Or": " || "
+    # Python operators translated to C++ operators, keyed by the ast operator
+    # class
+    operator_map = {ast.Add: "+", ast.Sub: "-", ast.Mult: " * ", ast.Div: "/",
+                    ast.Mod: " % ", ast.LShift: " << ", ast.RShift: " >> ",
+                    ast.BitOr: " | ", ast.BitAnd: " & ", ast.BitXor: " ^ ",
+                    ast.FloorDiv: "/", ast.Pow: "Pow", ast.Not: "!",
+                    ast.Invert: "~", ast.UAdd: "+", ast.USub: "-",
+                    ast.And: " && ", ast.Or: " || "
                     }
-    # Tuple of all functions we have a special conversion from python to C++
-    ported_functions = ("print", "sqrt", "pow","log","len","append","add", "remove","discard")
+    # Set of all functions we have a special conversion from python to C++
+    ported_functions = frozenset({"print", "sqrt", "pow", "log", "len",
+                                  "append", "add", "remove", "discard"})
     
     
+    # Translations of the ported functions and collection methods, as
+    # {name: (translation taking the argument strings and types, return
+    # type, include file or None, check on the number of arguments or None,
+    # error if the check fails)}
+    ported_function_table = {
+        "print": (lambda args, arg_types: pf.print_translation(args),
+                  "None", "iostream", None, None),
+        "sqrt": (lambda args, arg_types: pf.sqrt_translation(args),
+                 "float", "cmath", lambda count: count <= 1,
+                 "TODO: Can't square more than 1 item"),
+        "pow": (lambda args, arg_types: pf.pow_translation(args),
+                "float", "cmath", lambda count: count == 2,
+                "TODO: Can't find power using less than 2 or more than 2 items"),
+        "log": (lambda args, arg_types: pf.log_translation(args),
+                "float", "cmath", lambda count: count <= 2,
+                "TODO: Can't find log using  more than 2 items"),
+        "len": (pf.len_translation, "int", None, lambda count: count <= 1,
+                "TODO: Can't find length using  more than 1 item"),
+        "append": (pf.append_translation, "void", None, None, None),
+        "add": (pf.add_translation, "void", None, None, None),
+        "remove": (pf.remove_discard_translation, "void", None, None, None),
+        "discard": (pf.remove_discard_translation, "void", None, None, None),
+        "clear": (lambda args, arg_types: pf.clear_translation(),
+                  "void", None, None, None),
+    }
+
+    # Collection methods parse_Call can translate, as {method name: (
+    # collection kinds searched in order, description used in errors,
+    # number of arguments, error if the arguments don't match)}. Methods
+    # taking an argument need it to match the collection's element type
+    collection_methods = {
+        "append": (("vectors",), "vector", 1,
+                   "TODO: append expects one argument of matching vector element type"),
+        "add": (("sets",), "set", 1,
+                "TODO: add or remove or discard expects one argument of matching set element type"),
+        "remove": (("sets",), "set", 1,
+                   "TODO: add or remove or discard expects one argument of matching set element type"),
+        "discard": (("sets",), "set", 1,
+                    "TODO: add or remove or discard expects one argument of matching set element type"),
+        "clear": (("vectors", "sets"), "collection", 0,
+                  "TODO: clear expects no argument "),
+    }
+
     # Python Comparison operators translated to C++ operators
     # We aren't able to do in/is checks easily, so they are excluded from the
     # mapping
-    comparison_map = {"Eq": " == ", "NotEq": " != ", "Lt": " < ",
-                      "LtE": " <= ", "Gt": " > ", "GtE": " >= "
+    comparison_map = {ast.Eq: " == ", ast.NotEq: " != ", ast.Lt: " < ",
+                      ast.LtE: " <= ", ast.Gt: " > ", ast.GtE: " >= "
                       }
     
     def __init__(self, output_files, raw_lines):
@@ -54,6 +105,70 @@ class PyAnalyzer():
         self.output_files = output_files
 
         self.raw_lines = raw_lines
+
+        # Line lookups for find_else_lineno, computed once per script.
+        # _prev_code_line holds the index of the closest line at or above each
+        # line that isn't a comment or blank (-1 if there is none), since those
+        # can sit between an else and its body. _else_col holds where "else:"
+        # starts on each line (-1 if it doesn't)
+        self._prev_code_line = []
+        prev_code_line = -1
+        for index, line in enumerate(raw_lines):
+            if line.lstrip()[:1] not in ("#", ""):
+                prev_code_line = index
+            self._prev_code_line.append(prev_code_line)
+        self._else_col = [line.find("else:") for line in raw_lines]
+
+        # Dispatch table of {ast node class: statement handler}. Any statement
+        # not in the table falls back to parse_unhandled. Function and class
+        # definitions are handled during pre-analysis, so they are mapped to
+        # None to skip them
+        self._dispatch = {ast.Import: self.parse_Import,
+                          ast.ImportFrom: self.parse_ImportFrom,
+                          ast.If: self.parse_If,
+                          ast.While: self.parse_While,
+                          ast.For: self.parse_For,
+                          ast.Pass: self.parse_Pass,
+                          ast.Break: self.parse_Break,
+                          ast.Continue: self.parse_Continue,
+                          ast.Return: self.parse_Return,
+                          ast.Expr: self.parse_Expr,
+                          ast.Assign: self.parse_Assign,
+                          ast.FunctionDef: None,
+                          ast.ClassDef: None,
+                          }
+
+        # Names of the methods registered by parse_ClassDef during
+        # pre-analysis, used to skip them when collecting standalone functions
+        self._class_method_names = set()
+
+        # Dispatch table of {ast node class: expression handler} for
+        # recurse_operator
+        self._expr_dispatch = {ast.BinOp: self.parse_BinOp,
+                               ast.BoolOp: self.parse_BoolOp,
+                               ast.UnaryOp: self.parse_UnaryOp,
+                               ast.Compare: self.parse_Compare,
+                               ast.Call: self.parse_Call,
+                               ast.Name: self.parse_Name,
+                               ast.Constant: self.parse_Constant,
+                               ast.List: self.parse_List,
+                               ast.Tuple: self.parse_Tuple,
+                               ast.Set: self.parse_Set,
+                               ast.Subscript: self.parse_Subscript,
+                               ast.Attribute: self.parse_Attribute,
+                               }
+
+        # Variable types found by find_var_type_or_none, keyed by
+        # (file_index, function_key, name). Cleared whenever a variable is
+        # declared as that can change what a name refers to
+        self._var_type_cache = {}
+
+        # Frames still to be processed while analyze_tree is running, None
+        # when no analysis is in progress. See run_work_stack
+        self._work_stack = None
+
+        # Method function keys already split into (class name, method name)
+        self._function_key_parts = {}
         
     def analyze(self, tree, file_index, function_key, indent):
         """
@@ -71,6 +186,7 @@ class PyAnalyzer():
         indent : int
             How much indentation a line should have
         """
+        self._var_type_cache.clear()
         self.pre_analysis(tree, file_index, indent)
         self.analyze_tree(tree, file_index, function_key, indent)
         
@@ -80,25 +196,33 @@ class PyAnalyzer():
         Performs pre-analysis on the script by going through and translating
         all classes and standalone functions declared in this script.
         """
-        # First, process all class definitions to register classes and their methods
-        for node in tree:
-            if node.__class__ is ast.ClassDef:
-                self.parse_ClassDef(node, file_index, "-1", indent)
-
-        # Collect class method names to filter them out
-        class_method_names = set()
-        for cpp_class in self.output_files[file_index].classes.values():
-            class_method_names.update(cpp_class.methods.keys())
-
-        # Then, process standalone function declarations (skipping class methods)
+        # Bucket the top level definitions in a single pass over the tree
+        class_defs, func_defs = [], []
         for node in tree:
-            if node.__class__ is ast.FunctionDef and node.name not in class_method_names:
-                self.parse_function_header(node, file_index)
+            cls = node.__class__
+            if cls is ast.ClassDef:
+                class_defs.append(node)
+            elif cls is ast.FunctionDef:
+                func_defs.append(node)
+
+        # First, process all class definitions to register classes and their
+        # methods. parse_ClassDef records the method names as it goes so they
+        # can be filtered out of the standalone functions
+        self._class_method_names = set()
+        for node in class_defs:
+            self.parse_ClassDef(node, file_index, "-1", indent)
+
+        class_method_names = self._class_method_names
+        function_nodes = [node for node in func_defs
+                          if node.name not in class_method_names]
+
+        # Then, process standalone function declarations
+        for node in function_nodes:
+            self.parse_function_header(node, file_index)
 
         # Finally, parse the bodies of standalone functions
-        for node in tree:
-            if node.__class__ is ast.FunctionDef and node.name not in class_method_names:
-                self.analyze_tree(node.body, file_index, node.name, indent)
+        for node in function_nodes:
+            self.analyze_tree(node.body, file_index, node.name, indent)
                 
             
     def parse_ClassDef(self, node, file_index, function_key, indent):
@@ -117,7 +241,7 @@ class PyAnalyzer():
             How much indentation a line should have.
         """
         # Extract base classes
-        bases = [base.id for base in node.bases if isinstance(base, ast.Name)]
+        bases = [base.id for base in node.bases if base.__class__ is ast.Name]
         if len(node.bases) != len(bases):
             self.parse_unhandled(node, file_index, function_key, indent,
                                 "TODO: Only simple base classes (by name) are supported")
@@ -129,19 +253,21 @@ class PyAnalyzer():
 
         # Parse class body for methods and attributes
         for item in node.body:
-            if isinstance(item, ast.FunctionDef):
+            if item.__class__ is ast.FunctionDef:
                 # Parse method headers
                 self.parse_function_header(item, file_index, class_name=node.name)
-            elif isinstance(item, ast.Assign):
+            elif item.__class__ is ast.Assign:
                 # Handle instance variables (e.g., self.x = 5 in __init__)
                 self.parse_class_attribute(item, file_index, node.name, indent)
             else:
                 self.parse_unhandled(item, file_index, function_key, indent,
                                     "TODO: Only methods and assignments supported in classes")
+        # Remember the registered method names for pre_analysis
+        self._class_method_names.update(cpp_class.methods)
 
         # Parse method bodies
         for item in node.body:
-            if isinstance(item, ast.FunctionDef):
+            if item.__class__ is ast.FunctionDef:
                 self.analyze_tree(item.body, file_index, f"{node.name}::{item.name}", indent + 1)
                 
     def parse_function_header(self, node, file_index, class_name=None):
@@ -149,7 +275,8 @@ class PyAnalyzer():
         Parses an ast.FunctionDef node and determines the function name and
         parameters and stores this information in a CPPFunction object.
         """
-        func_ref = self.output_files[file_index].functions
+        out_file = self.output_files[file_index]
+        func_ref = out_file.functions
         func_key = f"{class_name}::{node.name}" if class_name else node.name
         # Skip if function is already registered
         if func_key in func_ref:
@@ -157,29 +284,34 @@ class PyAnalyzer():
             return
 
         args = node.args
-        if len(args.kw_defaults) > 0 or len(args.kwonlyargs) > 0 \
-            or len(args.posonlyargs) > 0 or args.kwarg is not None \
-                or args.vararg is not None:
+        if args.kw_defaults or args.kwonlyargs or args.posonlyargs \
+                or args.kwarg is not None or args.vararg is not None:
             return
 
-        default_args_index = len(args.args) - len(args.defaults)
-        params = {}
+        args_args = args.args
+        defaults = args.defaults
+        default_args_index = len(args_args) - len(defaults)
+        # Parameters are collected as (name, CPPVariable) pairs and turned
+        # into the lookup table in one go
+        pairs = []
+        append = pairs.append
 
-        for index in range(len(args.args)):
-            name = args.args[index].arg
+        for index, arg in enumerate(args_args):
+            name = arg.arg
             if index == 0 and name == "self" and class_name:
                 continue
             if index >= default_args_index:
-                default = args.defaults[index - default_args_index]
-                default_type = [type(default.value).__name__]
-                if default_type[0] == "str":
-                    params[name] = cvar.CPPVariable(name + "=\"" + default.value + "\"",
-                                                    -1, default_type)
+                default_value = defaults[index - default_args_index].value
+                type_name = sys.intern(type(default_value).__name__)
+                if type_name == "str":
+                    append((name, cvar.CPPVariable(f'{name}="{default_value}"',
+                                                   -1, [type_name])))
                 else:
-                    params[name] = cvar.CPPVariable(name + "=" + str(default.value),
-                                                    -1, default_type)
+                    append((name, cvar.CPPVariable(f"{name}={default_value!s}",
+                                                   -1, [type_name])))
             else:
-                params[name] = cvar.CPPVariable(name, -1, ["auto"])
+                append((name, cvar.CPPVariable(name, -1, ["auto"])))
+        params = dict(pairs)
 
         if node.name =="__init__":
             func = cfun.CPPFunction(class_name, node.lineno, node.end_lineno, params)
@@ -187,11 +319,8 @@ class PyAnalyzer():
         else:
             func = cfun.CPPFunction(node.name, node.lineno, node.end_lineno, params)
         if class_name:
-            self.output_files[file_index].classes[class_name].add_method(func)
-            func_ref[func_key] = func
-        else:
-            # print(f"Registering standalone function: {node.name}")
-            func_ref[node.name] = func
+            out_file.classes[class_name].add_method(func)
+        out_file.add_function(func_key, func)
             
     def parse_class_attribute(self, node, file_index, class_name, indent):
         """
@@ -208,8 +337,9 @@ class PyAnalyzer():
         indent : int
             How much indentation a line should have.
         """
-        if len(node.targets) != 1 or not isinstance(node.targets[0], ast.Attribute) \
-                or not isinstance(node.targets[0].value, ast.Name) or node.targets[0].value.id != "self":
+        out_file = self.output_files[file_index]
+        if len(node.targets) != 1 or node.targets[0].__class__ is not ast.Attribute \
+                or node.targets[0].value.__class__ is not ast.Name or node.targets[0].value.id != "self":
             self.parse_unhandled(node, file_index, f"{class_name}::__init__", indent,
                                 "TODO: Only self.<attribute> assignments are supported in classes")
             return
@@ -221,43 +351,46 @@ class PyAnalyzer():
             self.parse_unhandled(node, file_index, f"{class_name}::__init__", indent, ex.reason)
             return
         # print(assign_str,assign_type)
-        class_ref=self.output_files[file_index].classes[class_name]
+        class_ref=out_file.classes[class_name]
         code_str=None
         if assign_type[0] == "List":
-            self.output_files[file_index].add_include_file("vector")
-            vector = cvec.CPPVector(name=attr_name, py_var_type=assign_type[1], elements=assign_str)
-            class_ref.vectors[attr_name] = vector
+            out_file.add_include_file("vector")
+            cpp_vector = cvec.CPPVector(name=attr_name, py_var_type=assign_type[1], elements=assign_str)
+            class_ref.add_vector(cpp_vector)
             
             
         elif assign_type[0] == "Tuple":
-            self.output_files[file_index].add_include_file("tuple")
-            tuple = ctup.CPPTuple(name=attr_name, elements=assign_str, element_types=assign_type[1])
-            class_ref.tuples[attr_name] = tuple
+            out_file.add_include_file("tuple")
+            cpp_tuple = ctup.CPPTuple(name=attr_name, elements=assign_str, element_types=assign_type[1])
+            class_ref.add_tuple(cpp_tuple)
             
         elif assign_type[0] =="Set":
-            self.output_files[file_index].add_include_file("unordered_set")
-            set= cset.CPPSet(name= attr_name,py_var_type=assign_type[1], elements=assign_str)
-            class_ref.sets[attr_name]= set
+            out_file.add_include_file("unordered_set")
+            cpp_set = cset.CPPSet(name=attr_name, py_var_type=assign_type[1], elements=assign_str)
+            class_ref.add_set(cpp_set)
             
         else:
         # Create and add attribute to class
             c_var = cvar.CPPVariable(attr_name, node.lineno, assign_type)
             class_ref.add_attribute(c_var)
             code_str = f"this->{attr_name} = {assign_str};"
+        # A new attribute can hide names that were already looked up
+        self._var_type_cache.clear()
 
         # If in __init__, add assignment to the method
         init_key = f"{class_name}::__init__"
-        if init_key in self.output_files[file_index].functions and code_str is not None:
+        if init_key in out_file.functions and code_str is not None:
             
-            self.output_files[file_index].functions[init_key].lines[node.lineno] = \
-                cline.CPPCodeLine(node.lineno, node.end_lineno, node.end_col_offset, indent, code_str)
+            out_file.functions[init_key].set_line(node.lineno,
+                cline.CPPCodeLine(node.lineno, node.end_lineno, node.end_col_offset, indent, code_str))
     
     
     def analyze_tree(self, tree, file_index, function_key, indent):
         """
-        Accepts an AST node body list and parses through it
-        recursively. It will look at each node and call
-        the respective functions to handle each type
+        Accepts an AST node body list and parses through it. It will look at
+        each node and call the respective functions to handle each type.
+        Nested bodies are queued on the work stack rather than parsed
+        recursively, see run_work_stack
 
         Parameters
         ----------
@@ -270,16 +403,91 @@ class PyAnalyzer():
         indent : int
             How much indentation a line should have
         """
-        for node in tree:
-            # Skipping function definitions as we handled them during
-            # pre-analysis
-            if node.__class__ not in (ast.FunctionDef, ast.ClassDef):
-                # Using strategy found in ast.py built-in module
-                handler_name = "parse_" + node.__class__.__name__
-                # Will find if the function called handler_name exists,
-                # otherwise it returns parse_unhandled(fallback function)
-                handler = getattr(self, handler_name, self.parse_unhandled)
-                handler(node, file_index, function_key, indent)
+        self.run_work_stack([(iter(tree), file_index, function_key, indent)])
+
+    def analyze_body(self, body, file_index, function_key, indent, on_done,
+                     on_error=None):
+        """
+        Schedules the body of a control statement to be parsed, followed by
+        a callback that finishes off the statement (e.g. closing brackets).
+        Handlers must not do any work after calling this, as the body may
+        only be parsed once the handler has returned
+
+        Parameters
+        ----------
+        body : List of ast nodes
+            The statements in the body
+        file_index : int
+            Index of the file to write to in the output_files list
+        function_key : str
+            Key used to find the correct function in the function dictionary
+        indent : int
+            How much indentation the body should have
+        on_done : callable
+            Called with no arguments once the body has been parsed
+        on_error : callable, optional
+            Called with the exception if a TranslationNotSupported is raised
+            while parsing the body. Without it, the exception propagates
+        """
+        self.run_work_stack([(on_done, on_error),
+                             (iter(body), file_index, function_key, indent)])
+
+    def run_work_stack(self, frames):
+        """
+        Processes frames from the work stack until it is empty. Body frames
+        are (node iterator, file_index, function_key, indent) and parse one
+        node at a time, callback frames are (on_done, on_error). If the stack
+        is already being processed, the frames are pushed on top of it so
+        they run before the rest of the current body
+
+        Parameters
+        ----------
+        frames : list of tuple
+            The frames to add, the last one is processed first
+
+        Raises
+        ------
+        TranslationNotSupported
+            If a body fails to translate and no callback handles the error
+        """
+        work_stack = self._work_stack
+        if work_stack is not None:
+            work_stack.extend(frames)
+            return
+
+        work_stack = self._work_stack = frames
+        dispatch = self._dispatch
+        unhandled = self.parse_unhandled
+        try:
+            while work_stack:
+                frame = work_stack[-1]
+                try:
+                    if len(frame) == 2:
+                        # Everything queued after the callback is done
+                        work_stack.pop()
+                        frame[0]()
+                        continue
+
+                    node = next(frame[0], None)
+                    if node is None:
+                        work_stack.pop()
+                        continue
+                    handler = dispatch.get(node.__class__, unhandled)
+                    # Skipping function and class definitions as we handled
+                    # them during pre-analysis
+                    if handler is not None:
+                        handler(node, frame[1], frame[2], frame[3])
+                except pcex.TranslationNotSupported as ex:
+                    # Unwind to the closest statement that handles the error
+                    while work_stack:
+                        frame = work_stack.pop()
+                        if len(frame) == 2 and frame[1] is not None:
+                            frame[1](ex)
+                            break
+                    else:
+                        raise
+        finally:
+            self._work_stack = None
     
     
     def parse_unhandled(self, node, file_index, function_key, indent,
@@ -305,24 +513,22 @@ class PyAnalyzer():
         """
         # Get a reference to the correct function to shorten code width
         func_ref = self.output_files[file_index].functions[function_key]
-        func_ref.lines[node.lineno] = cline.CPPCodeLine(node.lineno,
-                                                        node.lineno,
-                                                        node.end_col_offset,
-                                                        indent,
-                                                        "/*" + self.raw_lines[node.lineno-1],
-                                                        "", reason)
+        set_line = func_ref.set_line
+        CL = cline.CPPCodeLine
+        raw_lines = self.raw_lines
+        set_line(node.lineno, CL(node.lineno, node.lineno, node.end_col_offset,
+                                 indent, f"/*{raw_lines[node.lineno-1]}",
+                                 "", reason))
 
         # If the code spanned multiple lines, we need to pull all
         # of the lines from the original script, not just the first
         # line
-        for index in range(node.lineno+1, node.end_lineno+1):
-            func_ref.lines[index] = cline.CPPCodeLine(index,
-                                                      index,
-                                                      node.end_col_offset,
-                                                      indent,
-                                                      self.raw_lines[index-1])
+        end_col_offset = node.end_col_offset
+        block = raw_lines[node.lineno:node.end_lineno]
+        for index, raw_line in enumerate(block, node.lineno+1):
+            set_line(index, CL(index, index, end_col_offset, indent, raw_line))
         # Add the closing comment symbol on the last line
-        func_ref.lines[node.end_lineno].code_str += "*/"
+        func_ref.get_line(node.end_lineno).code_str += "*/"
 
     # Imports
     def parse_Import(self, node, file_index, function_key, indent):
@@ -382,7 +588,10 @@ class PyAnalyzer():
         if_str : str
             Indicates whether to be an if or else if statement
         """
-        func_ref= self.output_files[file_index].functions[function_key]
+        func_ref = self.output_files[file_index].functions[function_key]
+        set_line, get_line = func_ref.set_line, func_ref.get_line
+        CL = cline.CPPCodeLine
+        pad = CL.tab_delimiter * indent
         
         # Parse conditions and add in the code to the current function
         
@@ -393,35 +602,34 @@ class PyAnalyzer():
             self.parse_unhandled(node, file_index,function_key,indent, ex.reason)
             return
         
-        func_ref.lines[node.lineno]= cline.CPPCodeLine(node.lineno, 
-                                                      node.end_lineno, 
-                                                      node.end_col_offset,
-                                                      indent,
-                                                      if_str+" ("+ test_str + ")\n"
-                                                      + indent*cline.CPPCodeLine.tab_delimiter
-                                                      +"{")
-        self.analyze_tree(node.body,file_index, function_key,indent+1)
-        
-        # Get the last code line and add the closing bracket
-        func_ref.lines[node.body[-1].end_lineno].code_str+="\n" + indent*cline.CPPCodeLine.tab_delimiter+ "}"
-        
-        # Looking for else if or else cases
-        if len(node.orelse) == 1 and node.orelse[0].__class__ is ast.If:
-            # Else if case
-            self.parse_If(node.orelse[0], file_index, function_key, indent,
-                          "else if")
-        elif len(node.orelse)> 0:
-            #Else case
-            else_lineno,else_end_col_offset= self.find_else_lineno(node.orelse[0].lineno-2)
-            func_ref.lines[else_lineno]= cline.CPPCodeLine(else_lineno,
-                                                           else_lineno,
-                                                           else_end_col_offset,
-                                                           indent,
-                                                           "else\n"+ indent*cline.CPPCodeLine.tab_delimiter + "{")
-            self.analyze_tree(node.orelse, file_index, function_key, indent+1)
-            
+        set_line(node.lineno, CL(node.lineno, node.end_lineno,
+                                 node.end_col_offset, indent,
+                                 f"{if_str} ({test_str})\n{pad}{{"))
+
+        def close_orelse():
+            # Get the last code line and add the closing bracket
+            get_line(node.orelse[-1].end_lineno).code_str += f"\n{pad}}}"
+
+        def close_body():
             # Get the last code line and add the closing bracket
-            func_ref.lines[node.orelse[-1].end_lineno].code_str+= "\n" + indent*cline.CPPCodeLine.tab_delimiter + "}"
+            get_line(node.body[-1].end_lineno).code_str += f"\n{pad}}}"
+            
+            # Looking for else if or else cases
+            if len(node.orelse) == 1 and node.orelse[0].__class__ is ast.If:
+                # Else if case
+                self.parse_If(node.orelse[0], file_index, function_key, indent,
+                              "else if")
+            elif len(node.orelse)> 0:
+                #Else case
+                else_lineno,else_end_col_offset= self.find_else_lineno(node.orelse[0].lineno-2)
+                set_line(else_lineno, CL(else_lineno, else_lineno,
+                                         else_end_col_offset, indent,
+                                         f"else\n{pad}{{"))
+                self.analyze_body(node.orelse, file_index, function_key,
+                                  indent+1, close_orelse)
+
+        self.analyze_body(node.body, file_index, function_key, indent+1,
+                          close_body)
     
     
     def find_else_lineno(self, search_index):
@@ -446,20 +654,13 @@ class PyAnalyzer():
         TranslationNotSupported
             If an else is not found
         """        
-        while search_index > -1:
-            # Check line isn't a comment
-            if self.raw_lines[search_index].lstrip()[0] == "#":
-                search_index -= 1
-                continue
-            else:
-                end_col_offset = self.raw_lines[search_index].find("else:")
-                if end_col_offset < 0:
-                    raise pcex.TranslationNotSupported("TODO: No corresponding else found")
-                else:
-                    end_col_offset += 4
-                    
-                search_index += 1
-                return search_index, end_col_offset
+        # Skip over any comments or blank lines above the search index
+        search_index = self._prev_code_line[search_index]
+        end_col_offset = self._else_col[search_index] if search_index > -1 else -1
+        if end_col_offset < 0:
+            raise pcex.TranslationNotSupported("TODO: No corresponding else found")
+
+        return search_index + 1, end_col_offset + 4
 
     def parse_While(self, node, file_index, function_key, indent):
         """
@@ -478,6 +679,9 @@ class PyAnalyzer():
             How much indentation a line should have
         """
         func_ref = self.output_files[file_index].functions[function_key]
+        set_line, get_line = func_ref.set_line, func_ref.get_line
+        CL = cline.CPPCodeLine
+        pad = CL.tab_delimiter * indent
         
         try:
             test_str = self.recurse_operator(node.test, file_index, function_key)[0]
@@ -485,20 +689,16 @@ class PyAnalyzer():
             self.parse_unhandled(node, file_index, function_key, indent, ex.reason)
             return
         
-        func_ref.lines[node.lineno] = cline.CPPCodeLine(node.lineno,
-                                                        node.end_lineno,
-                                                        node.end_col_offset,
-                                                        indent,
-                                                        "while (" + test_str + ")\n"
-                                                        + indent * cline.CPPCodeLine.tab_delimiter
-                                                        + "{")
-        
-        self.analyze_tree(node.body, file_index, function_key, indent + 1)
+        set_line(node.lineno, CL(node.lineno, node.end_lineno,
+                                 node.end_col_offset, indent,
+                                 f"while ({test_str})\n{pad}{{"))
+
+        def close_body():
+            # Closing the body of the while loop
+            get_line(node.body[-1].end_lineno).code_str += f"\n{pad}}}"
         
-        # Closing the body of the while loop
-        func_ref.lines[node.body[-1].end_lineno].code_str += "\n" \
-                                                             + indent * cline.CPPCodeLine.tab_delimiter \
-                                                             + "}"
+        self.analyze_body(node.body, file_index, function_key, indent + 1,
+                          close_body)
                                                              
     def parse_Pass(self, node, file_index, function_key, indent):
         """
@@ -519,6 +719,29 @@ class PyAnalyzer():
         pass        
     
                                                
+    def add_simple_statement(self, node, file_index, function_key, indent,
+                             code_str):
+        """
+        Adds a statement that always translates to the same code, such as a
+        break, as a line of the current function
+
+        Parameters
+        ----------
+        node : ast node
+            The ast node being translated
+        file_index : int
+            Index of the file to write to in the output_files list
+        function_key : str
+            Key used to find the correct function in the function dictionary
+        indent : int
+            How much indentation a line should have
+        code_str : str
+            The C++ code for the statement
+        """
+        self.output_files[file_index].functions[function_key].set_line(
+            node.lineno, cline.CPPCodeLine(node.lineno, node.end_lineno,
+                                           node.end_col_offset, indent, code_str))
+
     def parse_Break(self, node, file_index, function_key, indent):
         """
         Handles parsing an ast.Break node.
@@ -534,12 +757,8 @@ class PyAnalyzer():
         indent : int
             How much indentation a line should have
         """
-        func_ref = self.output_files[file_index].functions[function_key]
-        func_ref.lines[node.lineno] = cline.CPPCodeLine(node.lineno,
-                                                        node.end_lineno,
-                                                        node.end_col_offset,
-                                                        indent,
-                                                        "break;")
+        self.add_simple_statement(node, file_index, function_key, indent,
+                                  "break;")
         
     def parse_Continue(self, node, file_index, function_key, indent):
         """
@@ -556,12 +775,8 @@ class PyAnalyzer():
         indent : int
             How much indentation a line should have
         """
-        func_ref = self.output_files[file_index].functions[function_key]
-        func_ref.lines[node.lineno] = cline.CPPCodeLine(node.lineno,
-                                                        node.end_lineno,
-                                                        node.end_col_offset,
-                                                        indent,
-                                                        "continue;")
+        self.add_simple_statement(node, file_index, function_key, indent,
+                                  "continue;")
         
     
     def parse_Return(self, node, file_index, function_key, indent):
@@ -579,13 +794,11 @@ class PyAnalyzer():
         indent : int
             How much indentation a line should have
         """
-        func_ref = self.output_files[file_index].functions[function_key]
         if node.value is None:
-            func_ref.lines[node.lineno] = cline.CPPCodeLine(node.lineno,
-                                                            node.end_lineno,
-                                                            node.end_col_offset,
-                                                            indent, "return;")
+            self.add_simple_statement(node, file_index, function_key, indent,
+                                      "return;")
         else:
+            func_ref = self.output_files[file_index].functions[function_key]
             try:
                 return_str, return_type = self.recurse_operator(node.value,
                                                                 file_index,
@@ -597,11 +810,11 @@ class PyAnalyzer():
 
             func_ref.return_type = self.type_precedence(return_type,
                                                         func_ref.return_type)
-            func_ref.lines[node.lineno] = cline.CPPCodeLine(node.lineno,
-                                                            node.end_lineno,
-                                                            node.end_col_offset,
-                                                            indent,
-                                                            "return " + return_str + ";")
+            lineno = node.lineno
+            func_ref.set_line(lineno, cline.CPPCodeLine(lineno, node.end_lineno,
+                                                        node.end_col_offset,
+                                                        indent,
+                                                        f"return {return_str};"))
     def convert_docstring(self, doc_string, indent):
         """
         Converts a python docstring to a C++ multiline comment
@@ -619,20 +832,15 @@ class PyAnalyzer():
             The python docstring converted to a C++ multiline comment
         """
         # We remove the preceding whitespace as we will add our own later
-        doc_string = doc_string.strip()
-        tab_char = cline.CPPCodeLine.tab_delimiter
-        return_str = "/*\n"
-
-        # Every line of the docstring will need the indentation added
-        while doc_string.find("\n") > -1:
-            doc_string = doc_string.lstrip()
-            return_str += (tab_char * indent) + doc_string[:doc_string.find("\n")] + "\n"
-            doc_string = doc_string[doc_string.find("\n") + 1:]
-
-        # Adds the last piece of the docstring
-        doc_string = doc_string.lstrip()
-        return_str += tab_char * indent + doc_string
-        return return_str + "\n" + (tab_char * indent) + "*/"
+        lines = doc_string.strip().splitlines()
+        pad = cline.CPPCodeLine.tab_delimiter * indent
+
+        # Every line of the docstring will need the indentation added, blank
+        # lines are kept empty rather than padded with whitespace
+        stripped = (line.lstrip() for line in lines)
+        return "/*\n" + "\n".join(pad + line if line else line
+                                   for line in stripped) \
+               + "\n" + pad + "*/"
     
     
     def parse_Expr(self, node, file_index, function_key, indent):
@@ -657,8 +865,10 @@ class PyAnalyzer():
         if node.value.__class__ is ast.Constant:
             if type(node.value.value) is str:
                 # Verify this is a docstring
-                start_chars = self.raw_lines[node.value.lineno-1].strip()[0:3]
-                if start_chars == '"""' or start_chars == "'''":
+                # Check the quotes right where the string starts rather than
+                # stripping the whole line
+                line = self.raw_lines[node.value.lineno-1]
+                if line.startswith(('"""', "'''"), node.value.col_offset):
                     return_str = self.convert_docstring(node.value.value,
                                                         indent)
                 else:
@@ -691,10 +901,11 @@ class PyAnalyzer():
                                  "TODO: Value not assigned or used")
             return
 
-        func_ref.lines[node.value.lineno] = cline.CPPCodeLine(node.value.lineno,
-                                                              node.value.end_lineno,
-                                                              node.end_col_offset,
-                                                              indent, return_str)
+        func_ref.set_line(node.value.lineno,
+                          cline.CPPCodeLine(node.value.lineno,
+                                            node.value.end_lineno,
+                                            node.end_col_offset,
+                                            indent, return_str))
         
         
     def parse_Assign(self, node, file_index, function_key, indent):
@@ -717,7 +928,9 @@ class PyAnalyzer():
         TranslationNotSupported
             If the python code cannot be directly translated.
         """
-        function_ref = self.output_files[file_index].functions[function_key]
+        out_file = self.output_files[file_index]
+        function_ref = out_file.functions[function_key]
+        lineno = node.lineno
 
         # Won't handle chained assignment
         if len(node.targets) > 1:
@@ -725,25 +938,29 @@ class PyAnalyzer():
                                  "TODO: Unable to translate chained assignment")
             return
 
+        # Extract class name from function_key (e.g., "MyClass::method")
+        class_name, sep, _ = function_key.partition("::")
+        target = node.targets[0]
+        target_class = target.__class__
         # Check if this is a class attribute assignment (self.<attr>)
-        if isinstance(node.targets[0], ast.Attribute) and \
-           isinstance(node.targets[0].value, ast.Name) and \
-           node.targets[0].value.id == "self" and \
-           "::" in function_key:
-            # Extract class name from function_key (e.g., "MyClass::method")
-            class_name = function_key.split("::")[0]
-            if class_name in self.output_files[file_index].classes:
+        if sep and target_class is ast.Attribute:
+            owner = target.value
+            if owner.__class__ is ast.Name and owner.id == "self" \
+               and class_name in out_file.classes:
                 self.parse_class_attribute(node, file_index, class_name, indent)
                 return
-    
 
         # Handle regular variable assignment
-        if not isinstance(node.targets[0], ast.Name):
+        if target_class is not ast.Name:
             self.parse_unhandled(node, file_index, function_key, indent,
                                  "TODO: Only simple variable or self.<attr> assignments supported")
             return
 
-        var_name = node.targets[0].id
+        var_name = target.id
+        # A declaration only changes what this name resolves to in this
+        # function, so only that cached lookup is dropped
+        var_type_cache = self._var_type_cache
+        cache_key = (file_index, function_key, var_name)
         # print(var_name)
         try:
             assign_str, assign_type = self.recurse_operator(node.value,
@@ -754,59 +971,50 @@ class PyAnalyzer():
                                  ex.reason)
             return
         if assign_type[0] == "List":
-            self.output_files[file_index].add_include_file("vector")
-            vector = cvec.CPPVector(name=var_name, py_var_type=assign_type[1], elements=assign_str)
-            function_ref.vectors[var_name] = vector
-            code_str = vector.declaration()
-            c_code_line = cline.CPPCodeLine(node.lineno, node.end_lineno,
-                                            node.end_col_offset, indent,
-                                            code_str)
+            out_file.add_include_file("vector")
+            cpp_vector = cvec.CPPVector(name=var_name, py_var_type=assign_type[1], elements=assign_str)
+            function_ref.add_vector(cpp_vector)
+            var_type_cache.pop(cache_key, None)
+            code_str = cpp_vector.declaration()
         elif assign_type[0] == "Tuple":
-            self.output_files[file_index].add_include_file("tuple")
-            tuple = ctup.CPPTuple(name=var_name, elements=assign_str, element_types=assign_type[1])
-            function_ref.tuples[var_name] = tuple
-            code_str = tuple.declaration()
-            c_code_line = cline.CPPCodeLine(node.lineno, node.end_lineno,
-                                            node.end_col_offset, indent,
-                                            code_str)
+            out_file.add_include_file("tuple")
+            cpp_tuple = ctup.CPPTuple(name=var_name, elements=assign_str, element_types=assign_type[1])
+            function_ref.add_tuple(cpp_tuple)
+            var_type_cache.pop(cache_key, None)
+            code_str = cpp_tuple.declaration()
         elif assign_type[0] =="Set":
-            self.output_files[file_index].add_include_file("unordered_set")
-            set= cset.CPPSet(name= var_name,py_var_type=assign_type[1], elements=assign_str)
-            function_ref.sets[var_name]= set
-            code_str= set.declaration()
-            c_code_line = cline.CPPCodeLine(node.lineno, node.end_lineno,
-                                            node.end_col_offset, indent,
-                                            code_str)
+            out_file.add_include_file("unordered_set")
+            cpp_set = cset.CPPSet(name=var_name, py_var_type=assign_type[1], elements=assign_str)
+            function_ref.add_set(cpp_set)
+            var_type_cache.pop(cache_key, None)
+            code_str = cpp_set.declaration()
             
         else:
             # Find if name exists in context
-            try:
-                py_var_type = self.find_var_type(var_name,
-                                                 file_index,
-                                                 function_key)
-                # Verify types aren't changing or we aren't losing precision
-                if py_var_type[0] != assign_type[0] \
-                   and (py_var_type[0] != "float" or assign_type[0] != "int"):
-                    self.parse_unhandled(node, file_index, function_key, indent,
-                                         "TODO: Refactor for C++. Variable types "
-                                         "cannot change or potential loss of "
-                                         "precision occurred")
-                    return
-                else:
-                    code_str = var_name + " = " + str(assign_str) + ";"
-                    c_code_line = cline.CPPCodeLine(node.lineno, node.end_lineno,
-                                                    node.end_col_offset, indent,
-                                                    code_str)
-            except pcex.VariableNotFound:
+            py_var_type = self.find_var_type_or_none(var_name,
+                                                     file_index,
+                                                     function_key)
+            if py_var_type is None:
                 # Declaration
-                c_var = cvar.CPPVariable(var_name, node.lineno, assign_type)
-                function_ref.variables[var_name] = c_var
-                code_str = var_name + " = " + str(assign_str) + ";"
-                c_code_line = cline.CPPCodeLine(node.lineno, node.end_lineno,
-                                                node.end_col_offset, indent,
-                                                code_str)
-
-        function_ref.lines[node.lineno] = c_code_line
+                c_var = cvar.CPPVariable(var_name, lineno, assign_type)
+                function_ref.add_variable(c_var)
+                var_type_cache.pop(cache_key, None)
+                code_str = f"{var_name} = {assign_str!s};"
+            # Verify types aren't changing or we aren't losing precision
+            elif py_var_type[0] != assign_type[0] \
+               and (py_var_type[0] != "float" or assign_type[0] != "int"):
+                self.parse_unhandled(node, file_index, function_key, indent,
+                                     "TODO: Refactor for C++. Variable types "
+                                     "cannot change or potential loss of "
+                                     "precision occurred")
+                return
+            else:
+                code_str = f"{var_name} = {assign_str!s};"
+
+        # Every branch that gets here produced the code for the line
+        function_ref.set_line(lineno, cline.CPPCodeLine(lineno, node.end_lineno,
+                                                        node.end_col_offset,
+                                                        indent, code_str))
         
     def parse_Call(self, node, file_index, function_key):
         """
@@ -833,116 +1041,139 @@ class PyAnalyzer():
         TranslationNotSupported
             If the python code cannot be directly translated.
         """
-        func_ref = self.output_files[file_index].functions
+        out_file = self.output_files[file_index]
+        func_ref = out_file.functions
 
-        # Process arguments and their types once for all cases
-        arg_list = []
-        arg_types = []
-        for arg in node.args:
-            arg_str, arg_type = self.recurse_operator(arg, file_index, function_key)
-            arg_list.append(arg_str)
-            arg_types.append(arg_type)
+        # Process arguments once for all cases, as (string, type) pairs
+        args = [self.recurse_operator(arg, file_index, function_key)
+                for arg in node.args]
 
         # Handle method calls (e.g., my_list.append(item))
-        if isinstance(node.func, ast.Attribute) and isinstance(node.func.value, ast.Name):
+        if node.func.__class__ is ast.Attribute and node.func.value.__class__ is ast.Name:
             var_name = node.func.value.id
             method_name = node.func.attr
-            try:
-                var_type = self.find_var_type(var_name, file_index, function_key)
-                if method_name == "append" :
-                # Find the vector in function or class scope
-                    vector = func_ref[function_key].vectors.get(var_name)
-                    if not vector and '::' in function_key:
-                        class_name = function_key.split('::')[0]
-                        vector = self.output_files[file_index].classes[class_name].vectors.get(var_name)
-                    if not vector:
-                        raise pcex.TranslationNotSupported(f"TODO: {var_name} is not a recognized vector")
-                
-                    # Ensure argument type matches vector's element type
-                    if len(arg_types) != 1 or arg_types[0][0] != vector.py_var_type[0]:
-                        raise pcex.TranslationNotSupported("TODO: append expects one argument of matching vector element type")
-                
-                    # self.output_files[file_index].add_include_file("vector")
-                    # Delegate to parse_ported_function with vector context
-                    return_str,return_type=self.parse_ported_function(file_index, function_key, method_name, arg_list, arg_types)
-                    return_str=f"{var_name}.{return_str}"
-                    return return_str,return_type
-                elif method_name == "add" or method_name=="remove" or method_name=="discard":
-                    set = func_ref[function_key].sets.get(var_name)
-                    if not set and '::' in function_key:
-                        class_name = function_key.split('::')[0]
-                        set = self.output_files[file_index].classes[class_name].sets.get(var_name)
-                    if not set:
-                        raise pcex.TranslationNotSupported(f"TODO: {var_name} is not a recognized set")
-                
-                    # Ensure argument type matches vector's element type
-                    if len(arg_types) != 1 or arg_types[0][0] != set.py_var_type[0]:
-                        raise pcex.TranslationNotSupported("TODO: add or remove or discard expects one argument of matching set element type")
-                
-                    # self.output_files[file_index].add_include_file("unordered_set")
-                    # Delegate to parse_ported_function with vector context
-                    return_str,return_type=self.parse_ported_function(file_index, function_key, method_name, arg_list, arg_types)
-                    return_str=f"{var_name}.{return_str}"
-                    return return_str,return_type
-                elif method_name =="clear":
-                    name = func_ref[function_key].vectors.get(var_name)
-                    if not name and '::' in function_key:
-                        class_name = function_key.split('::')[0]
-                        name = self.output_files[file_index].classes[class_name].vectors.get(var_name)
-                    if not name:
-                        name = func_ref[function_key].sets.get(var_name)
-                    
-                    if not name and '::' in function_key:
-                        class_name = function_key.split('::')[0]
-                        name = self.output_files[file_index].classes[class_name].sets.get(var_name)
-                    if not name:
-                        raise pcex.TranslationNotSupported(f"TODO: {var_name} is not a recognized collection")
-                
-                    # Ensure argument type matches vector's element type
-                    if len(arg_types) != 0 :
-                        raise pcex.TranslationNotSupported("TODO: clear expects no argument ")
-            
-                    # Delegate to parse_ported_function with vector context
-                    return_str,return_type=self.parse_ported_function(file_index, function_key, method_name, arg_list, arg_types)
-                    return_str=f"{var_name}.{return_str}"
-                    return return_str,return_type
-                else:
-                    raise pcex.TranslationNotSupported(f"TODO: Method {method_name} on {var_name} not supported")
-            except pcex.VariableNotFound:
+            if self.find_var_type_or_none(var_name, file_index, function_key) is None:
                 raise pcex.TranslationNotSupported(f"TODO: Variable {var_name} not found")
+            method_spec = PyAnalyzer.collection_methods.get(method_name)
+            if method_spec is None:
+                raise pcex.TranslationNotSupported(f"TODO: Method {method_name} on {var_name} not supported")
+
+            kinds, description, arity, arg_error = method_spec
+            # Find the collection in function or class scope
+            collection = self.resolve_collection(var_name, file_index,
+                                                 function_key, kinds)
+            if collection is None:
+                raise pcex.TranslationNotSupported(f"TODO: {var_name} is not a recognized {description}")
+
+            # Ensure arguments match the collection's element type
+            if len(args) != arity \
+                    or (arity and args[0][1][0] != collection.py_var_type[0]):
+                raise pcex.TranslationNotSupported(arg_error)
+
+            # Delegate to parse_ported_function with the collection context
+            return_str,return_type=self.parse_ported_function(file_index, function_key, method_name, args)
+            return_str=f"{var_name}.{return_str}"
+            return return_str,return_type
 
         # Handle regular function calls or casts
-        if not isinstance(node.func, ast.Name):
+        if node.func.__class__ is not ast.Name:
             raise pcex.TranslationNotSupported("TODO: Not a valid call")
 
         func_name = node.func.id
-        if func_name not in cvar.CPPVariable.types and func_name not in func_ref and func_name not in self.ported_functions:
+        types_map = cvar.CPPVariable.types
+        if func_name not in types_map and func_name not in func_ref and func_name not in _PORTED_FUNCTIONS:
             raise pcex.TranslationNotSupported(f"TODO: Call to function {func_name} not in scope")
 
         # Handle type casting (e.g., int(), str())
-        if func_name in cvar.CPPVariable.types:
+        if func_name in types_map:
+            args_str = ", ".join([arg_str for arg_str, _ in args])
             if func_name == "str":
-                self.output_files[file_index].add_include_file("string")
-                return_str = f"std::to_string({', '.join(arg_list)})"
+                out_file.add_include_file("string")
+                return_str = f"std::to_string({args_str})"
                 return_type = ["str"]
             else:
-                return_str = f"({cvar.CPPVariable.types[func_name][:-1]})({', '.join(arg_list)})"
+                return_str = f"({cvar.CPPVariable.cast_types[func_name]})({args_str})"
                 return_type = [func_name]
         # Handle defined functions
         elif func_name in func_ref:
             function = func_ref[func_name]
-            for param, passed_type in zip(function.parameters.values(), arg_types):
+            for param, (_, passed_type) in zip(function.parameters.values(), args):
                 param.py_var_type[0] = self.type_precedence(param.py_var_type, passed_type)[0]
-            return_str = f"{func_name}({', '.join(arg_list)})"
+            args_str = ", ".join([arg_str for arg_str, _ in args])
+            return_str = f"{func_name}({args_str})"
             return_type = function.return_type
         # Handle ported functions
         else:
-            return self.parse_ported_function(file_index, function_key, func_name, arg_list, arg_types)
+            return self.parse_ported_function(file_index, function_key, func_name, args)
 
         return return_str, return_type
     
-    def parse_ported_function(self, file_index, function_key, function, args,
-                              arg_types):
+    def split_function_key(self, function_key):
+        """
+        Splits the function key of a class method into the class name and the
+        method name, reusing the result for keys that were already split
+
+        Parameters
+        ----------
+        function_key : str
+            Key used to find the correct function in the function dictionary
+
+        Returns
+        -------
+        tuple of (str, str) or None
+            The class name and method name, or None if the key isn't for a
+            class method
+
+        Raises
+        ------
+        TranslationNotSupported
+            If the key has more than one class separator
+        """
+        parts = self._function_key_parts.get(function_key)
+        if parts is None:
+            if '::' not in function_key:
+                return None
+            parts = tuple(function_key.split('::'))
+            if len(parts) != 2:
+                raise pcex.TranslationNotSupported("function_key must be in format 'ClassName.method_name'")
+            self._function_key_parts[function_key] = parts
+        return parts
+
+    def resolve_collection(self, var_name, file_index, function_key, kinds):
+        """
+        Finds a collection by name, trying the function scope and then the
+        class scope for each kind of collection in turn
+
+        Parameters
+        ----------
+        var_name : str
+            Name of the collection
+        file_index : int
+            Index of the file to write to in the output_files list
+        function_key : str
+            Key used to find the correct function in the function dictionary
+        kinds : tuple of str
+            Names of the collection dictionaries to search, e.g. "vectors"
+
+        Returns
+        -------
+        CPPVector or CPPSet or None
+            The collection, or None if there isn't one with that name
+        """
+        out_file = self.output_files[file_index]
+        function_ref = out_file.functions[function_key]
+        class_name, sep, _ = function_key.partition('::')
+        class_ref = out_file.classes[class_name] if sep else None
+
+        for kind in kinds:
+            collection = getattr(function_ref, kind).get(var_name)
+            if collection is None and class_ref is not None:
+                collection = getattr(class_ref, kind).get(var_name)
+            if collection is not None:
+                return collection
+        return None
+
+    def parse_ported_function(self, file_index, function_key, function, args):
         """
         Converts a python version of a function to a C++ version
 
@@ -954,10 +1185,8 @@ class PyAnalyzer():
             Key used to find the correct function in the function dictionary
         function : str
             Name of the function to convert
-        args : list of str
-            List containing the arguments represented as strings
-        arg_types : list of list of str
-            List containing the types of each argument in a list of str
+        args : list of tuple of (str, list of str)
+            The arguments, each as its string representation and its type
 
         Returns
         -------
@@ -971,56 +1200,22 @@ class PyAnalyzer():
         TranslationNotSupported
             If the python code cannot be directly translated
         """
-        if function == "print":
-            return_str = pf.print_translation(args)
-            return_type = ["None"]
-            self.output_files[file_index].add_include_file("iostream")
-
-        elif function == "sqrt":
-            if len(args) > 1:
-                raise pcex.TranslationNotSupported("TODO: Can't square more than 1 item")
-            return_str = pf.sqrt_translation(args)
-            return_type = ["float"]
-            self.output_files[file_index].add_include_file("cmath")
-            
-        elif function == "pow":
-            if len(args) != 2:
-                raise pcex.TranslationNotSupported("TODO: Can't find power using less than 2 or more than 2 items")
-            return_str = pf.pow_translation(args)
-            return_type = ["float"]
-            self.output_files[file_index].add_include_file("cmath")
-            
-        elif function == "log":
-            if len(args) > 2:
-                raise pcex.TranslationNotSupported("TODO: Can't find log using  more than 2 items")
-            return_str = pf.log_translation(args)
-            return_type = ["float"]
-            self.output_files[file_index].add_include_file("cmath")
-            
-        elif function == "len":
-            if len(args)>1:
-                raise pcex.TranslationNotSupported("TODO: Can't find length using  more than 1 item")
-            return_str = pf.len_translation(args,arg_types)
-            return_type = ["int"]
-            
-        elif function =="append":
-            return_str= pf.append_translation(args,arg_types)
-            return_type="void"
-            
-        elif function =="add":
-            return_str= pf.add_translation(args, arg_types)
-            return_type="void"
-            
-        elif function =="remove" or function=="discard":
-            return_str= pf.remove_discard_translation(args, arg_types)
-            return_type="void"
-            
-        elif function =="clear":
-            return_str= pf.clear_translation()
-            return_type="void"
-
-
-        return return_str, return_type
+        spec = PyAnalyzer.ported_function_table.get(function)
+        if spec is None:
+            raise pcex.TranslationNotSupported(f"TODO: Function {function} has no C++ port")
+
+        translation, return_type, include_file, arg_check, arg_error = spec
+        if arg_check is not None and not arg_check(len(args)):
+            raise pcex.TranslationNotSupported(arg_error)
+        if include_file is not None:
+            self.output_files[file_index].add_include_file(include_file)
+
+        # The translators take the strings and the types separately
+        arg_strs = [arg_str for arg_str, _ in args]
+        arg_types = [arg_type for _, arg_type in args]
+        # Return types are handed out as new lists since they can be updated
+        # in place later on
+        return translation(arg_strs, arg_types), [return_type]
     
     def parse_Constant(self, node, file_index, function_key):
         """
@@ -1042,21 +1237,23 @@ class PyAnalyzer():
         return_type : list of str
             The type of the constant
         """
+        value = node.value
+        value_type = type(value)
         # Strings need to be wrapped in quotes
-        if type(node.value) is str:
+        if value_type is str:
             self.output_files[file_index].add_include_file("string")
-            return_str = ("\"" + node.value + "\"")
+            return_str = f"\"{value}\""
             return_type = ["str"]
 
         # Python booleans are capital while C++ is lowercase, so we need to
         # translate it
-        elif type(node.value) is bool:
-            return_str = cvar.CPPVariable.bool_map[str(node.value)]
+        elif value_type is bool:
+            return_str = "true" if value else "false"
             return_type = ["bool"]
 
         else:
-            return_str = str(node.value)
-            return_type = [type(node.value).__name__]
+            return_str = str(value)
+            return_type = [value_type.__name__]
 
         return return_str, return_type
     
@@ -1100,20 +1297,17 @@ class PyAnalyzer():
         if len(compare_nodes) < 2:
             raise pcex.TranslationNotSupported("TODO: Less than 2 items being compared")
 
-        return_str = ""
         ret_var_type = compare_nodes[0][1][0]
+        # The same operator joins every value
+        op_str = _OPERATOR_MAP[node.op.__class__]
         
-        # Go through all but the last one and create a string separated by
-        # the C++ version of the python operator
-        for compare_node in compare_nodes[:-1]:
+        # Create a string separated by the C++ version of the python operator
+        parts = []
+        for compare_node in compare_nodes:
             if compare_node[1][0] != ret_var_type:
                 mixed_types = True
-            return_str += (compare_node[0] +
-                           PyAnalyzer.operator_map[node.op.__class__.__name__])
-
-        if compare_nodes[-1][1][0] != ret_var_type:
-            mixed_types = True
-        return_str += compare_nodes[-1][0]
+            parts.append(compare_node[0])
+        return_str = op_str.join(parts)
         
         # Short circuit operators complicate type determination, so if they
         # aren't all the same type, we'll use auto, otherwise these operators
@@ -1124,8 +1318,7 @@ class PyAnalyzer():
         else:
             return_type = compare_nodes[0][1]
             
-        return_str = "(" + return_str + ")"
-        return return_str, return_type  
+        return f"({return_str})", return_type  
     
       
     def parse_BinOp(self, node, file_index, function_key):
@@ -1160,39 +1353,35 @@ class PyAnalyzer():
                                                       file_index,
                                                       function_key)
 
-        left_str = str(left_str)
-        right_str = str(right_str)
-        operator = node.op.__class__.__name__
-        if operator in PyAnalyzer.operator_map:
-            if operator == "Pow":
-                self.output_files[file_index].add_include_file("cmath")
-                return_str = "pow(" + left_str + ", " + right_str + ")"
-                return_type = ["float"]
-
-            elif operator == "FloorDiv":
-                return_str = left_str + " / " + right_str
-                # If they aren't both ints, we need to cast to int to truncate
-                if left_type[0] != "int" or right_type[0] != "int":
-                    return_str = "(int)(" + return_str + ")"
-                return_type = ["int"]
-
-            elif operator == "Div":
-                return_str = left_str + " / " + right_str
-                # We need to cast one to a double or it will perform integer
-                # math
-                if left_type[0] != "float" or right_type[0] != "float":
-                    return_str = "(double)" + return_str
-                return_type = ["float"]
+        operator = node.op.__class__
+        if operator not in _OPERATOR_MAP:
+            raise pcex.TranslationNotSupported("TODO: BinOp not supported")
 
-            else:
-                return_str = left_str \
-                              + PyAnalyzer.operator_map[operator] \
-                              + right_str
+        if operator is ast.Pow:
+            self.output_files[file_index].add_include_file("cmath")
+            return_str = f"pow({left_str}, {right_str})"
+            return_type = ["float"]
 
-                return_type = self.type_precedence(left_type, right_type)
+        elif operator is ast.FloorDiv:
+            return_str = f"{left_str} / {right_str}"
+            # If they aren't both ints, we need to cast to int to truncate
+            if left_type[0] != "int" or right_type[0] != "int":
+                return_str = f"(int)({return_str})"
+            return_type = ["int"]
 
-        return_str = "(" + return_str + ")"
-        return return_str, return_type
+        elif operator is ast.Div:
+            return_str = f"{left_str} / {right_str}"
+            # We need to cast one to a double or it will perform integer
+            # math
+            if left_type[0] != "float" or right_type[0] != "float":
+                return_str = f"(double){return_str}"
+            return_type = ["float"]
+
+        else:
+            return_str = f"{left_str}{_OPERATOR_MAP[operator]}{right_str}"
+            return_type = self.type_precedence(left_type, right_type)
+
+        return f"({return_str})", return_type
     
     def type_precedence(self, type_a, type_b):
         """
@@ -1212,20 +1401,14 @@ class PyAnalyzer():
         return_type : list of str
             The list that holds the type that should take precedence
         """
-        if type_a[0] in PyAnalyzer.type_precedence_dict and type_b[0] in PyAnalyzer.type_precedence_dict:
-
-            # Smaller value means higher precedence
-            if PyAnalyzer.type_precedence_dict[type_a[0]] < PyAnalyzer.type_precedence_dict[type_b[0]]:
-                return_type = type_a
-
-            else:
-                return_type = type_b
-
-        else:
+        a_wins = _TYPE_A_WINS.get((type_a[0], type_b[0]))
+        if a_wins is None:
             # Type doesn't exist in our precedence table
-            return_type = ["auto"]
+            return ["auto"]
 
-        return return_type
+        # The winning list itself is returned, not a copy, so later updates
+        # to it are still seen by the caller
+        return type_a if a_wins else type_b
     
     def parse_UnaryOp(self, node, file_index, function_key):
         """
@@ -1253,7 +1436,7 @@ class PyAnalyzer():
             If the python code cannot be directly translated
         """
         operator = node.op.__class__
-        if operator.__name__ not in PyAnalyzer.operator_map:
+        if operator not in _OPERATOR_MAP:
             raise pcex.TranslationNotSupported("TODO: UnaryOp not supported")
 
         return_str, return_type = self.recurse_operator(node.operand,
@@ -1266,8 +1449,7 @@ class PyAnalyzer():
         else:
             return_type = ["int"]
 
-        return_str = "(" + PyAnalyzer.operator_map[operator.__name__] + return_str + ")"
-        return return_str, return_type
+        return f"({_OPERATOR_MAP[operator]}{return_str})", return_type
     
     
     def parse_Compare(self, node, file_index, function_key):
@@ -1296,8 +1478,9 @@ class PyAnalyzer():
             If the python code cannot be directly translated
         """
         # Ensure we can do all types of operations present in code line
+        comparison_map = _CMP_MAP
         for op in node.ops:
-            if op.__class__.__name__ not in PyAnalyzer.comparison_map:
+            if op.__class__ not in comparison_map:
                 raise pcex.TranslationNotSupported("TODO: Comparison operation not supported")
 
         # Comparisons can be chained, so we use the left item as the
@@ -1306,25 +1489,17 @@ class PyAnalyzer():
                                                 file_index,
                                                 function_key)[0]
 
-        return_str = ""
-        # Chaining comparisons together with ands
-        for index in range(1, len(node.ops)-1):
-            comparator = self.recurse_operator(node.comparators[index],
+        parts = []
+        # Chaining comparisons together with ands, each comparator is
+        # compared with the one before it
+        for op, comparator_node in zip(node.ops, node.comparators):
+            comparator = self.recurse_operator(comparator_node,
                                                file_index,
                                                function_key)[0]
-            return_str += "(" + last_comparator \
-                          + PyAnalyzer.comparison_map[node.ops[index-1].__class__.__name__] \
-                          + comparator + ") && "
+            parts.append(f"({last_comparator}{comparison_map[op.__class__]}"
+                         f"{comparator})")
             last_comparator = comparator
-
-        # Add last comparison on the end
-        comparator = self.recurse_operator(node.comparators[-1],
-                                           file_index,
-                                           function_key)[0]
-
-        return_str += "(" + last_comparator + \
-                      PyAnalyzer.comparison_map[node.ops[-1].__class__.__name__] \
-                      + comparator + ")"
+        return_str = " && ".join(parts)
 
         # All comparisons come back as a bool
         return_type = ["bool"]
@@ -1356,56 +1531,48 @@ class PyAnalyzer():
         TranslationNotSupported
             If the python code cannot be directly translated
         """
-        
         node_type = node.__class__
-        if node_type is ast.BinOp:
-            return self.parse_BinOp(node, file_index, function_key)
+        handler = self._expr_dispatch.get(node_type)
+        if handler is not None:
+            return handler(node, file_index, function_key)
 
-        elif node_type is ast.BoolOp:
-            return self.parse_BoolOp(node, file_index, function_key)
-
-        elif node_type is ast.UnaryOp:
-            return self.parse_UnaryOp(node, file_index, function_key)
-
-        elif node_type is ast.Compare:
-            return self.parse_Compare(node, file_index, function_key)
+        # Anything we don't handle
+        raise pcex.TranslationNotSupported()
+        
+        
+    def parse_Name(self, node, file_index, function_key):
+        """
+        Handles parsing an ast.Name node
 
-        elif node_type is ast.Call:
-            return self.parse_Call(node, file_index, function_key)
+        Parameters
+        ----------
+        node : ast.Name
+            The ast.Name node to be translated
+        file_index : int
+            Index of the file to write to in the output_files list
+        function_key : str
+            Key used to find the correct function in the function dictionary
 
-        elif node_type is ast.Name:
-            # Variable should already exist if we're using it, so we just grab
-            # it from the current context
-            try:
-                return node.id, self.find_var_type(node.id,
-                                                   file_index,
-                                                   function_key)
-            except pcex.VariableNotFound:
-                # Can't handle non declared variables being used
-                raise pcex.TranslationNotSupported("TODO: Variable used before declaration")
+        Returns
+        -------
+        return_str : str
+            The name of the variable
+        return_type : list of str
+            The type of the variable
 
-        elif node_type is ast.Constant:
-            return self.parse_Constant(node, file_index, function_key)
-        
-        elif node_type is ast.List:
-            return self.parse_List(node,file_index,function_key)
-        elif node_type is ast.Tuple:
-            return self.parse_Tuple(node,file_index,function_key)
-        elif node_type is ast.Set:
-            return self.parse_Set(node,file_index,function_key)
-        elif node_type is ast.Subscript:
-            try:
-                return self.parse_Subscript(node,file_index,function_key)
-            except pcex.VariableNotFound:
-                raise pcex.TranslationNotSupported("TODO: Variable used before declaration")
-        elif node_type is ast.Attribute:
-            try:
-                return self.parse_Attribute(node, file_index,function_key)
-            except pcex.VariableNotFound:
-                raise pcex.TranslationNotSupported("TODO:Class Variable used before declaration")
-        else:
-            # Anything we don't handle
-            raise pcex.TranslationNotSupported()
+        Raises
+        ------
+        TranslationNotSupported
+            If the variable hasn't been declared
+        """
+        # Variable should already exist if we're using it, so we just grab
+        # it from the current context
+        var_type = self.find_var_type_or_none(node.id, file_index,
+                                              function_key)
+        if var_type is None:
+            # Can't handle non declared variables being used
+            raise pcex.TranslationNotSupported("TODO: Variable used before declaration")
+        return node.id, var_type
         
         
      # Helper methods
@@ -1432,56 +1599,66 @@ class PyAnalyzer():
         VariableNotFound
             If the variable can't be found in the given context
         """
-        if '::' in function_key:
-            parts = function_key.split('::')
-            if len(parts) != 2:
-                raise pcex.TranslationNotSupported("function_key must be in format 'ClassName.method_name'")
-    
-            class_name = parts[0]
-            func_name = parts[1]
-            function_ref = self.output_files[file_index].functions[function_key]
-            class_ref= self.output_files[file_index].classes[class_name]
+        var_type = self.find_var_type_or_none(name, file_index, function_key)
+        if var_type is None:
+            raise pcex.VariableNotFound()
+        return var_type
+
+    def find_var_type_or_none(self, name, file_index, function_key):
+        """
+        Finds the type of a variable in a given context, the same way as
+        find_var_type but returning None rather than raising when the
+        variable doesn't exist. Found types are cached until the next
+        declaration
+
+        Parameters
+        ----------
+        name : str
+            Name of the variable to find
+        file_index : int
+            Index of the file to find the variable
+        function_key : str
+            Key used to find the correct function in the function dictionary
+
+        Returns
+        -------
+        list : list of str or None
+            The list reference containing the variable type, or None if the
+            variable can't be found in the given context. Tuples and sets
+            give the shared markers _TUPLE_TYPE and _SET_TYPE
+        """
+        key = (file_index, function_key, name)
+        var_type = self._var_type_cache.get(key)
+        if var_type is not None:
+            return var_type
+
+        out_file = self.output_files[file_index]
+        function_ref = out_file.functions[function_key]
+        parts = self.split_function_key(function_key)
+        if parts is not None:
+            class_ref= out_file.classes[parts[0]]
             if name in class_ref.attributes:
-                return class_ref.attributes[name].py_var_type
+                var_type = class_ref.attributes[name].py_var_type
             elif name in class_ref.vectors:
-                return class_ref.vectors[name].py_var_type
+                var_type = class_ref.vectors[name].py_var_type
             elif name in class_ref.tuples:
-                return ['Tuple']
+                var_type = _TUPLE_TYPE
             elif name in class_ref.sets:
-                return['Set']
-            
-        
-            elif name in function_ref.parameters:
-                return function_ref.parameters[name].py_var_type
-
-            elif name in function_ref.variables:
-                return function_ref.variables[name].py_var_type
-            elif name in function_ref.vectors:
-                return function_ref.vectors[name].py_var_type
-            elif name in function_ref.tuples:
-                return ['Tuple']
-            elif name in function_ref.sets:
-                return['Set']
+                var_type = _SET_TYPE
+
+        if var_type is None:
+            kind, symbol = function_ref.symbol_index().get(name, (None, None))
+            if kind is None:
+                return None
+            elif kind == "tuples":
+                var_type = _TUPLE_TYPE
+            elif kind == "sets":
+                var_type = _SET_TYPE
             else:
-                raise pcex.VariableNotFound()
-            
-        else:
-            function_ref = self.output_files[file_index].functions[function_key]
-        
-            if name in function_ref.parameters:
-                return function_ref.parameters[name].py_var_type
-
-            elif name in function_ref.variables:
-                return function_ref.variables[name].py_var_type
-            elif name in function_ref.vectors:
-                return function_ref.vectors[name].py_var_type
-            elif name in function_ref.tuples:
-                return ['Tuple']
-            elif name in function_ref.sets:
-                return['Set']
+                var_type = symbol.py_var_type
 
-            else:
-                raise pcex.VariableNotFound()
+        self._var_type_cache[key] = var_type
+        return var_type
     
     def parse_List(self, node, file_index, function_key):
         """
@@ -1500,22 +1677,21 @@ class PyAnalyzer():
         """
         func_ref = self.output_files[file_index].functions[function_key]
 
-        # Parse elements of the list
-        elements = [self.recurse_operator(el, file_index, function_key) for el in node.elts]
-         # Extract data types and values
-        values = [el[0] for el in elements]
-        types = [el[1][0] for el in elements]  
-
-        # Check if all types are the same
-        common_type = types[0]
-        all_same_type = all(t == common_type for t in types)
-        
-        if all_same_type:
-            py_var_type=common_type
-        else:
-            raise pcex.TranslationNotSupported("TODO : Hetrogeneous Lists Not Supported")
-
-        
+        # Parse elements of the list, checking each type against the first
+        # as we go so a mixed list stops at the first mismatch
+        values = []
+        py_var_type = None
+        for el in node.elts:
+            value, el_type = self.recurse_operator(el, file_index, function_key)
+            if py_var_type is None:
+                py_var_type = el_type[0]
+            elif el_type[0] != py_var_type:
+                raise pcex.TranslationNotSupported("TODO : Hetrogeneous Lists Not Supported")
+            values.append(value)
+
+        # C++ needs an element type, which an empty list doesn't give us
+        if py_var_type is None:
+            raise pcex.TranslationNotSupported("TODO: Can't infer the element type of an empty list")
         return values,["List",py_var_type]
     
     
@@ -1531,35 +1707,45 @@ class PyAnalyzer():
             Index of the file to write to in the output_files list.
         function_key : str
             Key used to find the correct function in the function dictionary.
-        indent : int
-            How much indentation a line should have.
+
+        Raises
+        ------
+        TranslationNotSupported
+            If the subscripted variable hasn't been declared
         """
         func_ref = self.output_files[file_index].functions[function_key]
-        type="vector"
-        name = func_ref.vectors.get(node.value.id)
+        var_name = node.value.id
+        # Collections come first: a name redeclared as a vector or tuple
+        # after being a scalar is indexed as the collection
+        type = "vectors"
+        name = func_ref.vectors.get(var_name)
         if name is None:
-            # Check in variables
-            name = func_ref.tuples.get(node.value.id)
-            type="tuple"
+            type = "tuples"
+            name = func_ref.tuples.get(var_name)
         if name is None:
-            # Check in variables
-            name = func_ref.variables.get(node.value.id)
-            type="variable"
-        if name is None:
-            # Check in parameters
-            name = func_ref.parameters.get(node.value.id)
-            type="parameter"
-        if name is None:
-            # Raise error if not found in any collection
-            raise pcex.VariableNotFound()
+            # Check in variables and parameters
+            type, name = func_ref.symbol_index().get(var_name, (None, None))
+            if type != "variables" and type != "parameters":
+                # Raise error if not found in any collection that can be indexed
+                raise pcex.TranslationNotSupported("TODO: Variable used before declaration")
 
-        index = self.recurse_operator(node.slice, file_index, function_key)[0]
+        index_node = node.slice
+        if index_node.__class__ is ast.Constant and index_node.value.__class__ is int:
+            # Literal indices don't need a trip through recurse_operator
+            index_int = index_node.value
+            index = str(index_int)
+        else:
+            index_int = None
+            index = self.recurse_operator(index_node, file_index, function_key)[0]
         # print(index)
         if index is None:
             raise pcex.TranslationNotSupported("TODO: Range query on vector")
-        if type=="tuple":
+        if type=="tuples":
+            # std::get needs an index known at compile time
+            if index_int is None:
+                raise pcex.TranslationNotSupported("TODO: Tuple index must be an integer literal")
             access_code= f"std::get<{index}>({name.name})"
-            var_type= name.element_type_list[int(index)]
+            var_type= name.element_type_list[index_int]
         else:
         # Generate the C++ code for element access
             access_code = f"{name.name}[{index}]"
@@ -1624,11 +1810,12 @@ class PyAnalyzer():
             How much indentation a line should have.
         """
         func_ref = self.output_files[file_index].functions[function_key]
+        pad = cline.CPPCodeLine.tab_delimiter * indent
 
         try:
             declare=""
         # Ensure iterator is a range() call
-            if isinstance(node.iter, ast.Call) and isinstance(node.iter.func, ast.Name) and node.iter.func.id == "range":
+            if node.iter.__class__ is ast.Call and node.iter.func.__class__ is ast.Name and node.iter.func.id == "range":
                 start, end, step = self.handle_range_call(node.iter, file_index, function_key)
             
                 # target_st = node.target.id 
@@ -1644,9 +1831,9 @@ class PyAnalyzer():
             
                 # Construct the C++ for loop header
                 loop_header = f"for ({target_str} = {start}; {target_str} < {end}; {target_str} += {step})\n" \
-                          + indent * cline.CPPCodeLine.tab_delimiter + "{"
+                              f"{pad}{{"
                                                             
-            elif isinstance(node.iter, ast.Constant) and isinstance(node.iter.value, int):
+            elif node.iter.__class__ is ast.Constant and isinstance(node.iter.value, int):
                 
                 end = str(node.iter.value)
                 # target_st = node.target.id 
@@ -1660,7 +1847,7 @@ class PyAnalyzer():
                     
                 target_str = self.recurse_operator(node.target, file_index, function_key)[0]
                 loop_header = f"for ({target_str} = 0; {target_str} < {end}; {target_str}++)\n" \
-                          + indent * cline.CPPCodeLine.tab_delimiter + "{"
+                              f"{pad}{{"
                           
             else:
                 self.parse_unhandled(
@@ -1672,17 +1859,22 @@ class PyAnalyzer():
                 )
                 return
             
-            func_ref.lines[node.lineno] = cline.CPPCodeLine(
+            func_ref.set_line(node.lineno, cline.CPPCodeLine(
                     node.lineno, node.end_lineno, node.end_col_offset, indent,loop_header
-            )
-
-                # Process the body of the for loop
-            self.analyze_tree(node.body, file_index, function_key, indent + 1)
+            ))
 
+            def close_body():
                 # Closing the body of the for loop
-            func_ref.lines[node.body[-1].end_lineno].code_str += "\n" \
-                                                                 + indent * cline.CPPCodeLine.tab_delimiter \
-                                                            + "}"
+                func_ref.get_line(node.body[-1].end_lineno).code_str += f"\n{pad}}}"
+
+            def body_failed(ex):
+                # The whole loop is left for a manual port if its body can't
+                # be translated
+                self.parse_unhandled(node, file_index, function_key, indent, ex.reason)
+
+            # Process the body of the for loop
+            self.analyze_body(node.body, file_index, function_key, indent + 1,
+                              close_body, body_failed)
         except pcex.TranslationNotSupported as ex:
             self.parse_unhandled(node, file_index, function_key, indent, ex.reason)
             return
@@ -1708,13 +1900,13 @@ class PyAnalyzer():
         """
         func_ref = self.output_files[file_index].functions[function_key]
 
-        # Parse elements of the tuple
-        elements = [self.recurse_operator(el, file_index, function_key) for el in node.elts]
-        
-        # Extract data types and values
-        values = [el[0] for el in elements]
-        types = [el[1] for el in elements]
-        
+        # Parse elements of the tuple, collecting values and types together
+        values = []
+        types = []
+        for el in node.elts:
+            value, el_type = self.recurse_operator(el, file_index, function_key)
+            values.append(value)
+            types.append(el_type)
 
         # Return the tuple values and their types
         return values, ["Tuple", types]
@@ -1744,22 +1936,16 @@ class PyAnalyzer():
         if not isinstance(function_key, str) or '::' not in function_key:
             raise pcex.TranslationNotSupported("Cannot extract class name from function_key: invalid format")
     
-        # Split function_key on '.' to get class name and function name
-        parts = function_key.split('::')
-        if len(parts) != 2:
-            raise pcex.TranslationNotSupported("function_key must be in format 'ClassName.method_name'")
-    
-        class_name = parts[0]
-        func_name = parts[1]
+        # Checks the key is in the ClassName::method format
+        self.split_function_key(function_key)
 
         #   Handle attribute access
-        if isinstance(node.value, ast.Name) and node.value.id == "self":
+        if node.value.__class__ is ast.Name and node.value.id == "self":
             # Convert self.name to this->name
-            try:
-                var_type = self.find_var_type(node.attr, file_index, function_key)
-                return f"this->{node.attr}", var_type
-            except pcex.VariableNotFound:
+            var_type = self.find_var_type_or_none(node.attr, file_index, function_key)
+            if var_type is None:
                 raise pcex.TranslationNotSupported(f"Class attribute {node.attr} used before declaration")
+            return f"this->{node.attr}", var_type
         else:
             raise pcex.TranslationNotSupported(f"Unsupported attribute access {node.value.id}.{node.attr}")
         
@@ -1785,20 +1971,33 @@ class PyAnalyzer():
         """
         func_ref = self.output_files[file_index].functions[function_key]
 
-        # Parse elements of the set
-        elements = [self.recurse_operator(el, file_index, function_key) for el in node.elts]
-    
-        # Extract data types and values
-        values = [el[0] for el in elements]
-        types = [el[1][0] for el in elements]
-
-        # Check if all types are the same
-        common_type = types[0] if types else "auto"
-        all_same_type = all(t == common_type for t in types) if types else True
-    
-        if not all_same_type:
-            raise pcex.TranslationNotSupported("TODO: Heterogeneous sets not supported")
-    
-        
-    
-        return values, ["Set", common_type]
\ No newline at end of file
+        # Parse elements of the set, checking each type against the first
+        # as we go so a mixed set stops at the first mismatch
+        values = []
+        common_type = None
+        for el in node.elts:
+            value, el_type = self.recurse_operator(el, file_index, function_key)
+            if common_type is None:
+                common_type = el_type[0]
+            elif el_type[0] != common_type:
+                raise pcex.TranslationNotSupported("TODO: Heterogeneous sets not supported")
+            values.append(value)
+
+        # C++ needs an element type, which an empty set doesn't give us
+        if common_type is None:
+            raise pcex.TranslationNotSupported("TODO: Can't infer the element type of an empty set")
+        return values, ["Set", common_type]
+
+
+# Module level aliases of the PyAnalyzer lookup tables so the handlers can
+# reach them with a global lookup rather than a class attribute lookup
+_OPERATOR_MAP = PyAnalyzer.operator_map
+_CMP_MAP = PyAnalyzer.comparison_map
+_PORTED_FUNCTIONS = PyAnalyzer.ported_functions
+
+# Whether the first type of a pair takes precedence over the second, for
+# every pair of types in the precedence table. Smaller value means higher
+# precedence
+_TYPE_A_WINS = {(type_a, type_b): prec_a < prec_b
+                for type_a, prec_a in PyAnalyzer.type_precedence_dict.items()
+                for type_b, prec_b in PyAnalyzer.type_precedence_dict.items()}
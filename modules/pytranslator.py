@@ -1,4 +1,7 @@
 import ast 
+import itertools
+import os
+from concurrent.futures import ThreadPoolExecutor
 from modules import cppfile as cfile
 from modules import cppfunction as cfun
 from modules import cppvariable as cvar
@@ -32,121 +35,141 @@ class PyTranslator():
         main_function= cfun.CPPFunction("0",-1,-1,main_params)
         main_function.return_type[0]="int"
         
-        self.output_files[0].functions["0"]= main_function
+        self.output_files[0].add_function("0", main_function)
         
-    def write_cpp_files(self):
+    def write_cpp_file(self, file):
         """
-        This performs the process of converting the object representations
-        of the code into usable strings and writes them to the appropriate
-        output file
+        Writes a single C++ file to the output directory
+
+        Parameters
+        ----------
+        file : CPPFile
+            The file to write
         """
-        # Currently only one file, but this forms a basis to allow for multi-
-        # file outputs from classes in C++
-        for file in self.output_files:
-            try:
-                f = open(self.output_path + file.filename + ".cpp", "w")
+        # output_path is a directory, as set up by pycatalyst.convert
+        out_path = os.path.join(self.output_path, file.filename + ".cpp")
+        try:
+            with open(out_path, "w", encoding="utf-8") as f:
                 f.write(file.get_formatted_file_text())
-                f.close()
-            except IOError:
-                print("Error writing file: " + self.output_path
-                      + file.filename + ".cpp")
-        print("Output written to " + self.output_path)
+        except OSError:
+            print("Error writing file: " + out_path)
         
-    def ingest_comments(self,raw_lines):
+    def ingest_file_comments(self, file, raw_lines):
         """
         Pulls comments from the original script, converts them to C++ style comments, then puts them
-        into line dictionaries of their corresponding function so they are included during the
-        output phase
+        into line dictionaries of their corresponding function in the file so they are included
+        during the output phase
 
         Parameters
         ----------
+        file : CPPFile
+            The file whose functions the comments are added to
         raw_lines : list of str
             List of strings containing the original python script line by line
         """
         # First get a dictionary with every existing line of code. That way
         # we know whether to look for an inline comment or a full line comment
-        
-        for file in self.output_files:
-            all_lines_dict={}
-            for cfunction in file.functions.values():
-                # -merge-two-dictionaries-in-a-single-expression-in-python
-                # -taking-union-of
-                all_lines_dict={**all_lines_dict,**cfunction.lines}
-            for c_class in file.classes.values():
-                for method in c_class.methods.values():
-                    all_lines_dict = {**all_lines_dict, **method.lines}
-                
-            # Going through all lines in the script we are parsing   
-            for index in range(len(raw_lines)):
-                # Line numbers count from 1 while list starts from 0, so we need to offset by 1
-                if (index+1) in all_lines_dict:
-                    # Looking fo inline comments
-                    code_line=all_lines_dict[index+1]
-                    comment=raw_lines[index][code_line.end_char_index:].lstrip()
-                    
-                    if len(comment)>0 and comment[0]=="#":
-                        # Trim off the comment symbol as it will be changed
-                        # to the C++ style comment
-                        all_lines_dict[index+1].comment_str=comment[1:].lstrip()
-                else:
-                    # Determine which function the line belongs to
-                    for function in file.functions.values():
-                        if function.lineno< index+1< function.end_lineno:
-                            line= raw_lines[index]
-                            comment= line.lstrip()
-                            if len(comment)>0 and comment[0]== "#":
-                                # C++ uses '//' to indicate comments instead of '#'
-                                comment= line.replace("#","//",1)
-                                function.lines[index+1]= cline.CPPCodeLine(index+1, index+1, len(line),0,comment)
-                                break
-                    else:
-                        line= raw_lines[index]
-                        comment=line.lstrip()
-                        if len(comment)>0 and comment[0]=="#":
-                            # We add an extra indent on code not in a function
-                            # since it will go into a function in C++
-                            comment=cline.CPPCodeLine.tab_delimiter+line.replace("#","//",1)
-                            file.functions["0"].lines[index+1]= cline.CPPCodeLine(index+1,index+1,len(line),0,comment)
-        
-        # Sort function line dictionaries so output is in proper order
-        for function in file.functions.values():
-            sorted_lines= {}
-            for line in sorted(function.lines.keys()):
-                sorted_lines[line]= function.lines[line]
-            function.lines = sorted_lines
+        # Merged in place so each function's lines are only copied once
+        all_lines_dict={}
+        for cfunction in file.functions.values():
+            all_lines_dict.update(cfunction.line_items())
         for c_class in file.classes.values():
-                for method in c_class.methods.values():
-                    sorted_lines = {line: method.lines[line] for line in sorted(method.lines.keys())}
-                    method.lines = sorted_lines
+            for method in c_class.methods.values():
+                all_lines_dict.update(method.line_items())
+
+        # Find the function each line falls inside once, rather than
+        # checking every function for every line. Functions are filled
+        # in reverse so the first function containing a line owns it
+        line_owner = [None] * (len(raw_lines) + 1)
+        for function in reversed(file.functions.values()):
+            for line_num in range(max(function.lineno + 1, 1),
+                                  min(function.end_lineno, len(raw_lines) + 1)):
+                line_owner[line_num] = function
+
+        # Going through all lines in the script we are parsing   
+        for line_num, line in enumerate(raw_lines, 1):
+            # Most lines have no comment at all, and the character scan
+            # for that is done in C, so those lines are skipped up front
+            if "#" not in line:
+                continue
+            code_line = all_lines_dict.get(line_num)
+            if code_line is not None:
+                # Looking for inline comments, which need nothing but
+                # whitespace between the code and the comment symbol
+                code_end = code_line.end_char_index
+                hash_index = line.find("#", code_end)
+                if hash_index == code_end or \
+                        (hash_index > code_end and line[code_end:hash_index].isspace()):
+                    # Trim off the comment symbol as it will be changed
+                    # to the C++ style comment
+                    code_line.comment_str=line[hash_index+1:].lstrip()
+                continue
+
+            # Full line comments only have whitespace before the symbol
+            hash_index = line.find("#")
+            if hash_index > 0 and not line[:hash_index].isspace():
+                continue
+            # C++ uses '//' to indicate comments instead of '#'
+            comment = line.replace("#","//",1)
+            # Determine which function the line belongs to
+            function = line_owner[line_num]
+            if function is None:
+                # We add an extra indent on code not in a function
+                # since it will go into a function in C++
+                function = file.functions["0"]
+                comment = cline.CPPCodeLine.tab_delimiter + comment
+            function.set_line(line_num, cline.CPPCodeLine(line_num, line_num, len(line),0,comment))
             
-    def apply_variable_types(self):
+    def apply_file_variable_types(self, file):
         """
-        Goes through every variable in every function to apply types to them
-        on declaration
+        Goes through every variable in every function of the file to apply
+        types to them on declaration
+
+        Parameters
+        ----------
+        file : CPPFile
+            The file whose variables are typed
         """
-        for file in self.output_files:
-            for cfunction in file.functions.values():
-                for variable in cfunction.variables.values():
-                    # Need to include string library for strings in C++
-                    if variable.py_var_type[0] == "str":
-                        file.add_include_file("string")
-                        
-                    # Prepend line with variable type to apply type
-                    cfunction.lines[variable.line_num].code_str \
-                        = cvar.CPPVariable.types[variable.py_var_type[0]] + cfunction.lines[variable.line_num].code_str
-                        
-            # Apply types for class attributes
-            for c_class in file.classes.values():
-                for attr in c_class.attributes.values():
-                    if attr.py_var_type[0] == "str":
-                        file.add_include_file("string")
-                    # Attributes are typed in class declaration
+        for cfunction in file.functions.values():
+            for variable in cfunction.variables.values():
+                # Need to include string library for strings in C++
+                if variable.py_var_type[0] == "str":
+                    file.add_include_file("string")
+
+                # Prepend line with variable type to apply type
+                code_line = cfunction.get_line(variable.line_num)
+                code_line.code_str \
+                    = cvar.CPPVariable.types[variable.py_var_type[0]] + code_line.code_str
+
+        # Apply types for class attributes
+        for c_class in file.classes.values():
+            for attr in c_class.attributes.values():
+                if attr.py_var_type[0] == "str":
+                    file.add_include_file("string")
+                # Attributes are typed in class declaration
+            
+    def finalize_file(self, file, raw_lines):
+        """
+        Runs every step after analysis for a single output file: typing the
+        declarations, adding the comments and writing the file. Files don't
+        share any state, so this can run for several files at once
+
+        Parameters
+        ----------
+        file : CPPFile
+            The file to finish
+        raw_lines : list of str
+            List of strings containing the original python script line by line
+        """
+        self.apply_file_variable_types(file)
+        self.ingest_file_comments(file, raw_lines)
+        self.write_cpp_file(file)
     
     def run(self):
         """
         Entry point for parsing a python script. This will read the script
         line by line until it reaches the end, then it will call
-        write_cpp_files to export the code into a cpp file
+        finalize_file on each output file to export the code into a cpp file
         """
         
         file_index=0
@@ -155,17 +178,24 @@ class PyTranslator():
         indent=1
         
         with open(self.script_path, "r") as py_source:
-            tree = ast.parse(py_source.read())
-            # resets pointer
-            py_source.seek(0)        
-            all_lines=py_source.read().splitlines()
+            source = py_source.read()
+        # The tree and the raw lines both come from the one read
+        tree = ast.parse(source, self.script_path)
+        all_lines=source.splitlines()
             
         analyzer=pyanalyzer.PyAnalyzer(self.output_files,all_lines)
         analyzer.analyze(tree.body,file_index,function_key,indent)
         
-        self.apply_variable_types()
-        self.ingest_comments(all_lines)
-        self.write_cpp_files()
+        # Writing is mostly waiting on the file system, so with several
+        # output files they are finished on a thread pool
+        if len(self.output_files) > 1:
+            with ThreadPoolExecutor() as pool:
+                list(pool.map(self.finalize_file, self.output_files,
+                              itertools.repeat(all_lines)))
+        else:
+            for file in self.output_files:
+                self.finalize_file(file, all_lines)
+        print("Output written to " + self.output_path)
         
                  
                         
@@ -0,0 +1,13 @@
+# Output templates for the C++ emitters. Each template is a plain format
+# string built once at import time and shared by every instance of the class
+# that uses it, so emission only has to fill in the pre-rendered sections.
+# Literal C++ braces are doubled so they survive str.format.
+
+# Class definition: name, inheritance list, member declarations and methods
+CLASS_TEMPLATE = "class {name}{bases}\n{{\npublic:\n{members}{methods}}};\n"
+
+# Function definition: signature, body lines and the optional main return
+FUNCTION_TEMPLATE = "{signature}\n{{\n{body}{main_return}}}"
+
+# Whole file: includes, forward declarations, then all definitions
+FILE_TEMPLATE = "{includes}{forward_declarations}\n{classes}{functions}"
@@ -35,7 +35,7 @@ def convert(script_path, output_dir):
     translator = pytranslator.PyTranslator(script_path, output_dir)
     
     # Run the translation process
-    # This method internally calls write_cpp_files() which saves the output
+    # This method internally calls finalize_file() which saves the output
     # and prints a confirmation message.
     translator.run()
 
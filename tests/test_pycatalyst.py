@@ -1,5 +1,14 @@
+import ast
 import modules.pyanalyzer as pya
 import modules.portedfunctions as pf
+import modules.cppfunction as cfun
+import modules.cppvariable as cvar
+import modules.cppfile as cfile
+import modules.cppclass as cclass
+import modules.cppcodeline as cline
+import modules.cpptuple as ctup
+import modules.cppvector as cvec
+import modules.pycatalystexceptions as pcex
 
 
 def test_print_translation():
@@ -9,6 +18,19 @@ def test_print_translation():
     assert translated_print == "std::cout << Hello World << std::endl"
 
 
+def test_print_translation_multiple_args():
+    args = ["a", "b", "c"]
+    translated_print = pf.print_translation(args)
+
+    assert translated_print == "std::cout << a + b + c << std::endl"
+
+
+def test_print_translation_no_args():
+    translated_print = pf.print_translation([])
+
+    assert translated_print == "std::cout << std::endl"
+
+
 def test_sqrt_translation():
     args = ["1"]
     translated_sqrt = pf.sqrt_translation(args)
@@ -54,3 +76,227 @@ def test_type_precedence_d():
     returned_type = analyzer.type_precedence(type_a, type_b)
 
     assert returned_type == type_a
+
+
+def test_signature_follows_parameter_type_updates():
+    params = {"val": cvar.CPPVariable("val", -1, ["auto"])}
+    function = cfun.CPPFunction("scale", 1, 2, params)
+
+    assert function.get_signature() == "void scale(auto val)"
+
+    params["val"].py_var_type[0] = "int"
+    function.return_type[0] = "float"
+
+    assert function.get_signature() == "double scale(int val)"
+    assert function.get_forward_declaration() == "double scale(int val)"
+
+
+def test_functions_do_not_share_default_parameters():
+    first = cfun.CPPFunction("first", 1, 2)
+    second = cfun.CPPFunction("second", 3, 4)
+    first.parameters["val"] = cvar.CPPVariable("val", -1, ["int"])
+
+    assert second.parameters == {}
+
+
+def test_include_files_keep_first_insertion_order():
+    cpp_file = cfile.CPPFile("main")
+    for include in ("string", "cmath", "string", "vector", "cmath"):
+        cpp_file.add_include_file(include)
+
+    assert list(cpp_file.includes) == ["string", "cmath", "vector"]
+
+
+def test_class_text_reflects_in_place_changes():
+    cpp_class = cclass.CPPClass("Point", 1, 5)
+    attribute = cvar.CPPVariable("x", 2, ["int"])
+    cpp_class.add_attribute(attribute)
+    method = cfun.CPPFunction("show", 3, 5)
+    cpp_class.add_method(method)
+    cpp_class.get_formatted_class_text()
+
+    attribute.py_var_type[0] = "float"
+    method.set_line(4, cline.CPPCodeLine(4, 4, 0, 1, "// shown"))
+    class_text = cpp_class.get_formatted_class_text()
+
+    assert "double x;" in class_text
+    assert "// shown" in class_text
+
+
+def test_recurse_operator_dispatches_on_node_class():
+    node = ast.parse("1 + 2", mode="eval").body
+
+    analyzer = pya.PyAnalyzer([cfile.CPPFile("main")], [])
+
+    assert analyzer.recurse_operator(node, 0, "0") == ("(1+2)", ["int"])
+
+
+def test_find_else_lineno_skips_comments_and_blank_lines():
+    raw_lines = ["if x:\n", "    pass\n", "else:\n", "\n", "    # comment\n",
+                 "    pass\n"]
+
+    analyzer = pya.PyAnalyzer([], raw_lines)
+
+    assert analyzer.find_else_lineno(4) == (3, 4)
+
+
+def test_convert_docstring_indents_every_line():
+    analyzer = pya.PyAnalyzer([], [])
+    comment = analyzer.convert_docstring("\n    First\n\n    Second\n    ", 1)
+
+    assert comment == "/*\n    First\n\n    Second\n    */"
+
+
+def test_find_var_type_sees_later_declarations():
+    main_function = cfun.CPPFunction("0", -1, -1)
+    output_file = cfile.CPPFile("main")
+    output_file.add_function("0", main_function)
+    analyzer = pya.PyAnalyzer([output_file], ["x = 1\n"])
+
+    assert analyzer.find_var_type_or_none("x", 0, "0") is None
+
+    analyzer.analyze(ast.parse("x = 1\n").body, 0, "0", 1)
+
+    assert analyzer.find_var_type("x", 0, "0") is main_function.variables["x"].py_var_type
+
+
+def test_ported_method_returns_type_list():
+    analyzer = pya.PyAnalyzer([cfile.CPPFile("main")], [])
+    return_str, return_type = analyzer.parse_ported_function(0, "0", "clear", [])
+
+    assert return_type == ["void"]
+
+
+def test_chained_comparison_keeps_every_operator():
+    node = ast.parse("1 < 2 <= 3", mode="eval").body
+
+    analyzer = pya.PyAnalyzer([cfile.CPPFile("main")], [])
+    compare_str, compare_type = analyzer.parse_Compare(node, 0, "0")
+
+    assert compare_str == "(1 < 2) && (2 <= 3)"
+    assert compare_type == ["bool"]
+
+
+def test_type_precedence_returns_winning_list():
+    analyzer = pya.PyAnalyzer([cfile.CPPFile("main")], [])
+    int_type = ["int"]
+    float_type = ["float"]
+
+    assert analyzer.type_precedence(int_type, float_type) is float_type
+    assert analyzer.type_precedence(float_type, int_type) is float_type
+    assert analyzer.type_precedence(["List"], int_type) == ["auto"]
+
+
+def test_symbol_index_prefers_parameters_and_sees_new_variables():
+    param = cvar.CPPVariable("val", -1, ["int"])
+    function = cfun.CPPFunction("scale", 1, 2, {"val": param})
+    assert function.symbol_index() == {"val": ("parameters", param)}
+
+    shadow = cvar.CPPVariable("val", 2, ["float"])
+    total = cvar.CPPVariable("total", 2, ["int"])
+    function.add_variable(shadow)
+    function.add_variable(total)
+
+    assert function.symbol_index()["val"] == ("parameters", param)
+    assert function.symbol_index()["total"] == ("variables", total)
+
+
+def test_function_text_orders_lines_by_line_number():
+    function = cfun.CPPFunction("show", 1, 4)
+    function.set_line(3, cline.CPPCodeLine(3, 3, 0, 1, "b = 2;"))
+    function.set_line(2, cline.CPPCodeLine(2, 2, 0, 1, "// first"))
+
+    body = function.get_formatted_function_text()
+
+    assert body.index("// first") < body.index("b = 2;")
+
+
+def test_list_elements_share_one_type():
+    output_file = cfile.CPPFile("main")
+    output_file.add_function("0", cfun.CPPFunction("0", -1, -1))
+    analyzer = pya.PyAnalyzer([output_file], [])
+
+    values, list_type = analyzer.parse_List(
+        ast.parse("[1, 2, 3]", mode="eval").body, 0, "0")
+    assert values == ["1", "2", "3"]
+    assert list_type == ["List", "int"]
+
+    mixed = ast.parse("[1, 2.5]", mode="eval").body
+    try:
+        analyzer.parse_List(mixed, 0, "0")
+    except pcex.TranslationNotSupported as ex:
+        assert "Hetrogeneous" in ex.reason
+    else:
+        assert False, "mixed list should not translate"
+
+    empty = ast.parse("[]", mode="eval").body
+    try:
+        analyzer.parse_List(empty, 0, "0")
+    except pcex.TranslationNotSupported as ex:
+        assert "empty list" in ex.reason
+    else:
+        assert False, "empty list has no element type"
+
+
+def test_tuple_subscript_needs_literal_index():
+    output_file = cfile.CPPFile("main")
+    main_function = cfun.CPPFunction("0", -1, -1)
+    main_function.add_tuple(ctup.CPPTuple("t", ["1", "2.5"], [["int"], ["float"]]))
+    main_function.add_variable(cvar.CPPVariable("i", 1, ["int"]))
+    output_file.add_function("0", main_function)
+    analyzer = pya.PyAnalyzer([output_file], [])
+    literal = ast.parse("t[1]", mode="eval").body
+    dynamic = ast.parse("t[i]", mode="eval").body
+
+    assert analyzer.parse_Subscript(literal, 0, "0") == ("std::get<1>(t)", ["float"])
+    try:
+        analyzer.parse_Subscript(dynamic, 0, "0")
+    except pcex.TranslationNotSupported as ex:
+        assert "literal" in ex.reason
+    else:
+        assert False, "tuple index must be known at compile time"
+
+
+def test_function_lines_are_indexed_by_line_number():
+    function = cfun.CPPFunction("show", 5, 9)
+    first = cline.CPPCodeLine(6, 6, 0, 1, "a = 1;")
+    early = cline.CPPCodeLine(4, 4, 0, 1, "// before")
+    function.set_line(6, first)
+    function.set_line(4, early)
+
+    assert function.get_line(6) is first
+    assert function.get_line(5) is None
+    assert function.get_line(20) is None
+    assert list(function.line_items()) == [(4, early), (6, first)]
+
+
+def test_subscript_prefers_collection_over_scalar_of_same_name():
+    output_file = cfile.CPPFile("main")
+    main_function = cfun.CPPFunction("0", -1, -1)
+    main_function.add_variable(cvar.CPPVariable("t", 1, ["float"]))
+    main_function.add_tuple(ctup.CPPTuple("t", ["1", "2"], [["int"], ["int"]]))
+    output_file.add_function("0", main_function)
+    scale = cfun.CPPFunction("scale", 3, 6,
+                             {"v": cvar.CPPVariable("v", -1, ["float"])})
+    scale.add_vector(cvec.CPPVector("v", "int", ["1", "2"]))
+    output_file.add_function("scale", scale)
+    analyzer = pya.PyAnalyzer([output_file], [])
+
+    tuple_access = ast.parse("t[0]", mode="eval").body
+    vector_access = ast.parse("v[1]", mode="eval").body
+
+    assert analyzer.parse_Subscript(tuple_access, 0, "0") == ("std::get<0>(t)", ["int"])
+    assert analyzer.parse_Subscript(vector_access, 0, "scale") == ("v[1]", ["int"])
+
+
+def test_call_with_collection_literal_argument():
+    source = "y = len([1, 2])\nfoo([1])\n"
+    output_file = cfile.CPPFile("main")
+    output_file.add_function("0", cfun.CPPFunction("0", -1, -1))
+    analyzer = pya.PyAnalyzer([output_file], source.splitlines())
+
+    analyzer.analyze(ast.parse(source).body, 0, "0", 1)
+
+    main_function = output_file.functions["0"]
+    assert main_function.get_line(1).code_str.endswith(".size();")
+    assert main_function.get_line(2).code_str == "/*foo([1])*/"